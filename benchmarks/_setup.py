@@ -0,0 +1,21 @@
+"""Makes the package importable for the benchmarks, import it before anything from aiogram_ext.
+
+Run the benchmarks from the repository root with plain python, e.g. `python benchmarks/callback_router.py`.
+The top-level `aiogram_ext/__init__.py` imports the PostgreSQL middleware, which expects the host
+project's `database` package, so the benchmarks load the modules they measure directly.
+"""
+
+import os
+import sys
+import types
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+# Settings that are read on import, the benchmarks never talk to Telegram.
+os.environ.setdefault("BOT_TOKEN", "123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA")
+os.environ.setdefault("LOG_GROUP_ID", "-100")
+
+if "aiogram_ext" not in sys.modules:
+    package = types.ModuleType("aiogram_ext")
+    package.__path__ = [os.path.join(SRC, "aiogram_ext")]
+    sys.modules["aiogram_ext"] = package
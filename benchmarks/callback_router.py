@@ -0,0 +1,101 @@
+"""Dispatch cost of callback queries with a few hundred registered handlers.
+
+The same handlers are registered once as `F.data.startswith` filters on a plain router and
+once on :class:`CallbackRouter`, then updates matching the first, middle and last handler, a
+CallbackData handler and no handler at all are fed through the dispatcher.
+
+    python benchmarks/callback_router.py [handlers] [updates]
+"""
+
+import _setup  # noqa: F401
+
+import asyncio
+import itertools
+import sys
+import time
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery, Update, User
+
+from aiogram_ext.routing.callback_router import CallbackRouter
+
+HANDLERS = 300
+UPDATES = 1_000
+
+update_ids = itertools.count(1)
+
+
+class ItemData(CallbackData, prefix="item"):
+    id: int
+
+
+def make_handler(key):
+    async def handler(event: CallbackQuery, callback_data=None) -> object:
+        return key
+
+    return handler
+
+
+def make_update(data: str) -> Update:
+    return Update(
+        update_id=next(update_ids),
+        callback_query=CallbackQuery(
+            id="1", from_user=User(id=1, is_bot=False, first_name="bench"), chat_instance="bench", data=data
+        )
+    )
+
+
+async def per_update(dispatcher: Dispatcher, bot: Bot, data: str, count: int) -> float:
+    updates = [make_update(data) for _ in range(count)]
+
+    started = time.perf_counter()
+    for update in updates:
+        await dispatcher.feed_update(bot, update)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+async def main() -> None:
+    handlers = int(sys.argv[1]) if len(sys.argv) > 1 else HANDLERS
+    updates = int(sys.argv[2]) if len(sys.argv) > 2 else UPDATES
+    bot = Bot("123456:AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA")
+
+    filters_dispatcher = Dispatcher()
+    router = Router()
+    for index in range(handlers):
+        router.callback_query.register(make_handler(index), F.data.startswith(f"action{index}_"))
+    router.callback_query.register(make_handler("item"), ItemData.filter())
+    filters_dispatcher.include_router(router)
+
+    trie_dispatcher = Dispatcher()
+    callback_router = CallbackRouter()
+    for index in range(handlers):
+        callback_router.register_callback(make_handler(index), prefix=f"action{index}_")
+    callback_router.register_callback(make_handler("item"), callback_data=ItemData)
+    trie_dispatcher.include_router(callback_router)
+
+    cases = (
+        ("first", "action0_x", 0),
+        ("middle", f"action{handlers // 2}_x", handlers // 2),
+        ("last", f"action{handlers - 1}_x", handlers - 1),
+        ("CallbackData", "item:42", "item"),
+        ("miss", "unknown", None),
+    )
+
+    for name, data, expected in cases:
+        for dispatcher in (filters_dispatcher, trie_dispatcher):
+            result = await dispatcher.feed_update(bot, make_update(data))
+            handled = None if result is None or result is UNHANDLED else result
+            # Guards against measuring a router that routes to the wrong handler.
+            assert handled == expected, f"{name}: expected {expected!r}, got {result!r}"
+
+        filters = await per_update(filters_dispatcher, bot, data, updates)
+        trie = await per_update(trie_dispatcher, bot, data, updates)
+        print(f"{name:13s} filters {filters:8.1f} us/update   trie {trie:6.1f} us/update   {filters / trie:5.1f}x")
+
+    await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""Stress test of :class:`KeyGenerator` across forked workers and threads.
+
+The parent configures a node ID and forks workers, every worker sets its own worker index and
+generates keys from several threads. All keys are collected and checked for uniqueness, the
+script exits with status 1 on any collision. It also checks that a forked child which was
+not given a worker index refuses to generate keys.
+
+    python benchmarks/key_generator_stress.py [workers] [keys_per_worker]
+"""
+
+import _setup  # noqa: F401
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from array import array
+
+from aiogram_ext.keyboard.keys import key_generator
+
+NODE_ID = 8
+WORKERS = 8
+THREADS = 4
+KEYS_PER_WORKER = 500_000
+
+
+def generate(worker_index: int, keys: int, path: str) -> None:
+    key_generator.set_worker_index(worker_index)
+
+    generated = array("q")
+    lock = threading.Lock()
+
+    def run() -> None:
+        local = [key_generator.next_id() for _ in range(keys // THREADS)]
+        with lock:
+            generated.extend(local)
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(path, "wb") as file:
+        generated.tofile(file)
+
+
+def generate_without_index(result: "multiprocessing.Queue") -> None:
+    try:
+        key_generator.next_id()
+        result.put(None)
+    except RuntimeError as error:
+        result.put(str(error))
+
+
+def check_unindexed_child() -> bool:
+    result = multiprocessing.Queue()
+    process = multiprocessing.Process(target=generate_without_index, args=(result,))
+    process.start()
+    error = result.get()
+    process.join()
+
+    if error is None:
+        print("FAIL: a forked child without worker index generated a key")
+        return False
+
+    print(f"ok: a forked child without worker index raises RuntimeError ({error[:60]}...)")
+    return True
+
+
+def main() -> int:
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else WORKERS
+    keys_per_worker = int(sys.argv[2]) if len(sys.argv) > 2 else KEYS_PER_WORKER
+
+    multiprocessing.set_start_method("fork")
+    key_generator.__init__(node_id=NODE_ID)
+
+    passed = check_unindexed_child()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [os.path.join(directory, f"keys_{index}.bin") for index in range(workers)]
+        processes = [
+            multiprocessing.Process(target=generate, args=(index, keys_per_worker, path))
+            for index, path in enumerate(paths)
+        ]
+
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        if any(process.exitcode for process in processes):
+            print("FAIL: a worker exited with an error")
+            return 1
+
+        total = 0
+        unique = set()
+        for path in paths:
+            generated = array("q")
+            with open(path, "rb") as file:
+                generated.frombytes(file.read())
+            total += len(generated)
+            unique.update(generated)
+
+    collisions = total - len(unique)
+    print(
+        f"{workers} workers x {THREADS} threads: {total} keys in {elapsed:.1f}s "
+        f"({total / elapsed:,.0f} keys/s), {collisions} collisions"
+    )
+
+    return 0 if passed and collisions == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
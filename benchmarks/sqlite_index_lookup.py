@@ -0,0 +1,74 @@
+"""Lookup latency of tracked menu messages against table size, before and after the migration.
+
+For every table size the table is filled without the (chat_id, msg_id) index, `get_last_menus`
+is timed for random chats, the migrations are run and the lookups are timed again.
+
+    python benchmarks/sqlite_index_lookup.py
+"""
+
+import _setup  # noqa: F401
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from aiogram_ext.storage.sqlite_storage.migrations import run_migrations
+from aiogram_ext.storage.sqlite_storage.models import Base, TableMenuMessage
+
+SIZES = (1_000, 10_000, 100_000, 500_000)
+ROWS_PER_CHAT = 5
+LOOKUPS = 200
+
+
+async def p50_lookup(session_maker: async_sessionmaker, chats: int) -> float:
+    timings = []
+    async with session_maker() as sqlite_session:
+        for _ in range(LOOKUPS):
+            chat_id = random.randrange(chats)
+            started = time.perf_counter()
+            await TableMenuMessage.get_last_menus(chat_id, sqlite_session)
+            timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    return timings[len(timings) // 2] * 1e6
+
+
+async def run(directory: str, rows: int) -> None:
+    path = os.path.join(directory, f"lookup_{rows}.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    chats = max(rows // ROWS_PER_CHAT, 1)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # Start from the schema before the index existed.
+        await conn.exec_driver_sql("DROP INDEX ix_table_menu_message_chat_id_msg_id")
+        await conn.exec_driver_sql("PRAGMA user_version = 0")
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.executemany(
+            "INSERT INTO table_menu_message (chat_id, msg_id) VALUES (?, ?)",
+            [(i % chats, i) for i in range(rows)]
+        )
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession)
+    before = await p50_lookup(session_maker, chats)
+
+    async with engine.begin() as conn:
+        version = await conn.run_sync(run_migrations)
+    after = await p50_lookup(session_maker, chats)
+
+    await engine.dispose()
+    print(f"rows={rows:>7}  p50 without index={before:9.1f} us  p50 migrated (v{version})={after:7.1f} us")
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in SIZES:
+            await run(directory, rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
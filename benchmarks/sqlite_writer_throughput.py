@@ -0,0 +1,91 @@
+"""Read-modify-write throughput of menu tracking with and without the single writer.
+
+Every chat replaces its tracked menu message in a loop, the way the menu middleware does.
+`default` opens a session per transaction on the plain engine, `writer` runs the same
+transaction through :class:`SqliteWriter` on a WAL engine. Lock errors are counted.
+
+    python benchmarks/sqlite_writer_throughput.py
+"""
+
+import _setup  # noqa: F401
+
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from aiogram_ext.storage.sqlite_storage.engine import create_sqlite_engine
+from aiogram_ext.storage.sqlite_storage.models import Base, TableMenuMessage
+from aiogram_ext.storage.sqlite_storage.writer import SqliteWriter
+
+OPERATIONS = 3_000
+CHATS = (1, 10, 100)
+
+
+async def replace_menu(chat_id: int, msg_id: int, sqlite_session: AsyncSession) -> None:
+    old_menus = await TableMenuMessage.get_last_menus(chat_id, sqlite_session)
+    await TableMenuMessage.close_last_menus(chat_id, list(old_menus), sqlite_session)
+    await TableMenuMessage.save_menu_message_id(chat_id, [msg_id], sqlite_session)
+
+
+async def run(directory: str, mode: str, chats: int) -> None:
+    url = f"sqlite+aiosqlite:///{os.path.join(directory, f'{mode}_{chats}.db')}"
+    base_engine = create_sqlite_engine(url)
+    async with base_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await base_engine.dispose()
+
+    done = errors = 0
+    per_chat = OPERATIONS // chats
+    writer = None
+
+    if mode == "default":
+        engine = create_sqlite_engine(url)
+        session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def transaction(chat_id: int, msg_id: int) -> None:
+            async with session_maker() as sqlite_session:
+                async with sqlite_session.begin():
+                    await replace_menu(chat_id, msg_id, sqlite_session)
+    else:
+        engine = create_sqlite_engine(url, wal=True, writer=True)
+        writer = SqliteWriter(engine)
+        await writer.start()
+
+        async def transaction(chat_id: int, msg_id: int) -> None:
+            async def job(sqlite_session: AsyncSession) -> None:
+                await replace_menu(chat_id, msg_id, sqlite_session)
+                await sqlite_session.flush()
+
+            await writer.submit(job)
+
+    async def chat(chat_id: int) -> None:
+        nonlocal done, errors
+        for msg_id in range(per_chat):
+            try:
+                await transaction(chat_id, msg_id)
+                done += 1
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(chat(chat_id) for chat_id in range(chats)))
+    elapsed = time.perf_counter() - started
+
+    if writer is not None:
+        await writer.stop()
+    await engine.dispose()
+    print(f"{mode:8} chats={chats:4}  {done / elapsed:8.0f} tx/s  errors={errors}")
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for chats in CHATS:
+            for mode in ("default", "writer"):
+                await run(directory, mode, chats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
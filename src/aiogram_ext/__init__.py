@@ -1,34 +1,62 @@
 from .bot.config import BotManager
+from .bot.scheduler import Lane, OutboundScheduler, outbound_lane
 from .enums.notification_type import NotificationType
 from .filters.chat_types import ChatTypeFilter
+from .filters.stored_callback import StoredCallbackFilter
 from .keyboard.keyboard import Keyboard
+from .keyboard.payload_store import CallbackPayloadStore
 from .logger.config import log_config
 from .logger.middleware import TelegramLoggerMiddleware
 from .logger.telegram_logger import TelegramLogger
+from .media.file_cache import FileIdCache
 from .menu.handlers import menu
 from .menu.registry import MenuRegistry
 from .middlewares.postgresql.engine import postgresql_session_maker
 from .middlewares.postgresql.middleware import PostgresqlSessionMiddleware
 from .middlewares.media import MediaMiddleware
+from .middlewares.album_server import AlbumServer, SocketAlbumBackend
+from .middlewares.chat_lock import ChatLockMiddleware
+from .middlewares.callback_debounce import CallbackDebounceMiddleware
 from .notification.notification import Notification
-from .storage.sqlite_storage.engine import sqlite_session_maker
+from .routing.callback_router import CallbackRouter
+from .storage.sqlite_storage.engine import create_sqlite_engine, sqlite_session_maker
+from .storage.sqlite_storage.ledger import MessageLedger
 from .storage.sqlite_storage.middleware import SqliteSessionMiddleware
+from .storage.sqlite_storage.outbox import TrackingOutbox
+from .storage.sqlite_storage.writer import SqliteWriter
+from .timer.service import TimerService
 
 __all__ = (
     "__version__",
     "BotManager",
+    "Lane",
+    "OutboundScheduler",
+    "outbound_lane",
     "NotificationType",
     "ChatTypeFilter",
+    "StoredCallbackFilter",
     "Keyboard",
+    "CallbackPayloadStore",
     "log_config",
     "TelegramLoggerMiddleware",
     "TelegramLogger",
+    "FileIdCache",
     "menu",
     "MenuRegistry",
     "postgresql_session_maker",
     "PostgresqlSessionMiddleware",
     "MediaMiddleware",
+    "AlbumServer",
+    "SocketAlbumBackend",
+    "ChatLockMiddleware",
+    "CallbackDebounceMiddleware",
     "Notification",
+    "CallbackRouter",
+    "create_sqlite_engine",
     "sqlite_session_maker",
+    "MessageLedger",
     "SqliteSessionMiddleware",
+    "TrackingOutbox",
+    "SqliteWriter",
+    "TimerService",
 )
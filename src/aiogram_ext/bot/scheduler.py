@@ -0,0 +1,236 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import AnswerCallbackQuery, Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+logger = logging.getLogger(__name__)
+
+
+class Lane(IntEnum):
+    """Priority lane of an outbound request, lower value goes first."""
+
+    INTERACTIVE = 0
+    DEFAULT = 1
+    BULK = 2
+
+
+_current_lane: ContextVar[Optional[Lane]] = ContextVar("outbound_lane", default=None)
+
+# Requests of these kinds count against Telegram's message limits.
+_LIMITED_PREFIXES = ("Send", "Copy", "Forward", "Edit")
+
+
+@contextmanager
+def outbound_lane(lane: Lane) -> Iterator[None]:
+    """Sends every request made inside the block through the given lane.
+
+    Example:
+        :code:`with outbound_lane(Lane.BULK): await bot.send_message(...)`
+    """
+
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of refusing."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Takes a token, returns how long the caller must wait before using it."""
+
+        self.refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, now: float, seconds: float) -> None:
+        """Makes the bucket hand out no token for the next `seconds`."""
+
+        self.refill(now)
+        # A token can be used once the bucket holds one, so it refills up to 1 at the end of the pause.
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def idle(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
+class OutboundScheduler(BaseRequestMiddleware):
+    """Rate limiter and priority scheduler for outgoing Bot API requests.
+
+    Message-producing requests (send/copy/forward/edit) take a token from their chat's bucket
+    and from the global bucket. Waiters for the global bucket are served lane by lane:
+    interactive traffic (callback answers, edits, deletes) always goes before default traffic,
+    which goes before bulk traffic (logs, broadcasts). Mark bulk code with :func:`outbound_lane`.
+    Other requests (answers, deletes, getters) are not limited. `TelegramRetryAfter` pauses
+    the chat's bucket and the global bucket, so every lane holds off, and the request is retried.
+
+    Usage:
+        :code:`bot.session.middleware(OutboundScheduler())`
+
+    Args:
+        global_rate: Messages per second for the whole bot (default: 30)
+        private_rate: Messages per second per private chat (default: 1)
+        group_rate: Messages per second per group or channel (default: 20 per minute)
+        chat_burst: Bucket capacity of a single chat (default: 3)
+        max_retries: Attempts after `TelegramRetryAfter` (default: 3)
+        max_idle_chats: Idle chat buckets kept before they are pruned (default: 10000)
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        private_rate: float = 1,
+        group_rate: float = 20 / 60,
+        chat_burst: float = 3,
+        max_retries: int = 3,
+        max_idle_chats: int = 10000,
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_idle_chats = max_idle_chats
+
+        self._chat_buckets: Dict[Union[int, str], TokenBucket] = {}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher_task: Optional[asyncio.Task] = None
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for the global bucket."""
+
+        return len(self._waiters)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        lane = self._lane(method)
+        chat_id = getattr(method, "chat_id", None)
+        limited = chat_id is not None and type(method).__name__.startswith(_LIMITED_PREFIXES)
+
+        for attempt in range(self.max_retries + 1):
+            if limited:
+                await self._acquire(chat_id, lane)
+
+            try:
+                return await make_request(bot, method)
+
+            except TelegramRetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+
+                logger.warning(
+                    "Flood control on %s (chat %s), retrying in %d seconds",
+                    type(method).__name__, chat_id, e.retry_after
+                )
+                if limited:
+                    # Flood control is usually bot-wide: the next `_acquire` of every chat and lane
+                    # waits out the pause, not only the requests of this chat.
+                    now = time.monotonic()
+                    self._chat_bucket(chat_id).pause(now, e.retry_after)
+                    self.global_bucket.pause(now, e.retry_after)
+                else:
+                    await asyncio.sleep(e.retry_after)
+
+    @staticmethod
+    def _lane(method: TelegramMethod) -> Lane:
+        if (lane := _current_lane.get()) is not None:
+            return lane
+
+        name = type(method).__name__
+        if isinstance(method, AnswerCallbackQuery) or name.startswith(("Edit", "Delete")):
+            return Lane.INTERACTIVE
+        return Lane.DEFAULT
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        if (bucket := self._chat_buckets.get(chat_id)) is None:
+            if len(self._chat_buckets) >= self.max_idle_chats:
+                self._prune()
+
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_rate if is_group else self.private_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, self.chat_burst)
+
+        return bucket
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.idle(now)]:
+            del self._chat_buckets[chat_id]
+
+    async def _acquire(self, chat_id: Union[int, str], lane: Lane) -> None:
+        """Waits for a token of the chat, then for a global token in lane order."""
+
+        delay = self._chat_bucket(chat_id).reserve(time.monotonic())
+        if delay:
+            await asyncio.sleep(delay)
+
+        if not self._waiters:
+            now = time.monotonic()
+            self.global_bucket.refill(now)
+            if self.global_bucket.tokens >= 1:
+                self.global_bucket.tokens -= 1
+                return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (lane, next(self._counter), future))
+        self._wakeup.set()
+
+        if self._dispatcher_task is None or self._dispatcher_task.done():
+            self._dispatcher_task = asyncio.create_task(self._dispatcher())
+
+        await future
+
+    async def _dispatcher(self) -> None:
+        """Grants global tokens to waiters, highest-priority lane first."""
+
+        while True:
+            while not self._waiters:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            now = time.monotonic()
+            self.global_bucket.refill(now)
+
+            if self.global_bucket.tokens < 1:
+                await asyncio.sleep((1 - self.global_bucket.tokens) / self.global_bucket.rate)
+                continue
+
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():  # the caller was cancelled
+                continue
+
+            self.global_bucket.tokens -= 1
+            future.set_result(None)
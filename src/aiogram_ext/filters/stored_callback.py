@@ -0,0 +1,43 @@
+from typing import Any, Dict, Optional, Union
+
+from aiogram.filters import Filter
+from aiogram.types import CallbackQuery
+
+from aiogram_ext.keyboard.payload_store import CallbackPayloadStore, StoredCallback
+
+
+class StoredCallbackFilter(Filter):
+    """Filter for callbacks of buttons whose payload lives in a :class:`CallbackPayloadStore`.
+
+    Resolves the token and passes the original payload to the handler as `payload`.
+    Without `store`, the store is taken from the `payload_store` workflow data.
+
+    Exapmles:
+        - :code:`@router.callback_query(StoredCallbackFilter(store))`
+        - :code:`@router.callback_query(StoredCallbackFilter(store, startswith="order_"))`
+    """
+
+    def __init__(self, store: Optional[CallbackPayloadStore] = None, startswith: Optional[str] = None):
+        self.store = store
+        self.startswith = startswith
+
+    async def __call__(
+        self,
+        callback: CallbackQuery,
+        payload_store: Optional[CallbackPayloadStore] = None
+    ) -> Union[bool, Dict[str, Any]]:
+        if not callback.data or not callback.data.startswith(f"{StoredCallback.__prefix__}{StoredCallback.__separator__}"):
+            return False
+
+        store = self.store or payload_store
+        if store is None:
+            raise RuntimeError("StoredCallbackFilter needs a store, pass it or set 'payload_store' in workflow data")
+
+        payload = await store.get(StoredCallback.unpack(callback.data).token)
+        if payload is None:
+            return False
+
+        if self.startswith is not None and not payload.startswith(self.startswith):
+            return False
+
+        return {"payload": payload}
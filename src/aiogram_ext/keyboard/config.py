@@ -0,0 +1,31 @@
+from typing import Optional
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+
+
+class KeyConfig(BaseSettings):
+    """
+    Notification key generator configuration.
+
+    The node ID of a process is `KEY_NODE_ID` plus its worker index. Give every deployment
+    that sends notifications into the same database its own range of node IDs, and every
+    worker process its own index: set `KEY_WORKER_INDEX` per process, or call
+    :meth:`aiogram_ext.keyboard.keys.KeyGenerator.set_worker_index` in each forked worker.
+    Without `KEY_NODE_ID`, the node ID is derived from the host name and process ID and may collide.
+
+    Example .env settings:
+
+        KEY_NODE_ID=8
+        KEY_WORKER_INDEX=0
+    """
+
+    KEY_NODE_ID: Optional[int] = Field(default=None, ge=0, le=1023)
+    KEY_WORKER_INDEX: Optional[int] = Field(default=None, ge=0, le=1023)
+
+    class Config:
+        env_file = ".env"
+        env_file_encoding = 'utf-8'
+        extra = 'ignore'
+
+key_config = KeyConfig()
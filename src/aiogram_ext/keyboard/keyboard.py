@@ -1,16 +1,26 @@
-from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import TYPE_CHECKING, List
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 
+from aiogram_ext.keyboard.keys import key_generator
+
+from aiogram_ext.keyboard.payload_store import LIBRARY_CALLBACKS
+
+if TYPE_CHECKING:
+    from aiogram_ext.keyboard.payload_store import CallbackPayloadStore
+
 
 class Keyboard:
 
     @staticmethod
     def generate_key(chat_id: int) -> str:
-        timestamp = int(datetime.now(timezone(timedelta())).timestamp())
-        return f"{timestamp}{chat_id}"
+        """Returns a unique notification key (see :class:`aiogram_ext.keyboard.keys.KeyGenerator`).
+
+        `chat_id` is no longer part of the key, the parameter is kept for compatibility.
+        """
+
+        return key_generator.next_key()
 
     @staticmethod
     def constructor_callback_btns(
@@ -54,6 +64,41 @@ class Keyboard:
 
         return keyboard.adjust(*sizes).as_markup()
 
+    @staticmethod
+    async def constructor_stored_callback_btns(
+        payload_store: "CallbackPayloadStore",
+        button_text: List[List[str]],
+        callback_data: List[List[str]],
+        key: str = None,
+        sizes: tuple[int] = (1,)
+    ) -> InlineKeyboardMarkup:
+        """Generates an inline keyboard whose callback payloads are kept in `payload_store`.
+
+        Buttons carry short tokens instead of the payloads, the library's own callbacks
+        (`delete_notification`, `clear_fsm_state`) keep their data.
+        """
+
+        if button_text is None or callback_data is None:
+            raise ValueError("Both button_text and callback_data must be provided.")
+
+        if len(button_text) != len(callback_data) or any(len(t) != len(d) for t, d in zip(button_text, callback_data)):
+            raise ValueError("button_text and callback_data must have the same structure")
+
+        stored = [data for row in callback_data for data in row if data not in LIBRARY_CALLBACKS]
+        tokens = dict(zip(stored, await payload_store.put_many(stored)))
+
+        btns = {}
+        for row_text, row_data in zip(button_text, callback_data):
+            for text, data in zip(row_text, row_data):
+                if data == "delete_notification":
+                    btns[text] = f"{data}_{key}"
+                elif data in LIBRARY_CALLBACKS:
+                    btns[text] = data
+                else:
+                    btns[text] = payload_store.pack(tokens[data])
+
+        return Keyboard.constructor_callback_btns(btns=btns, sizes=sizes)
+
     @staticmethod
     def constructor_reply_keyboard(
         *btns: str,
@@ -0,0 +1,146 @@
+import logging
+import os
+import socket
+import threading
+import time
+import zlib
+from typing import Optional
+
+from aiogram_ext.keyboard.config import key_config
+
+logger = logging.getLogger(__name__)
+
+BASE62_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+# 41 bits of milliseconds since KEY_EPOCH_MS (about 69 years), 10 bits of node ID, 12 bits of sequence.
+KEY_EPOCH_MS = 1704067200000  # 2024-01-01 00:00:00 UTC
+NODE_BITS = 10
+SEQUENCE_BITS = 12
+
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+def encode_base62(value: int) -> str:
+    """Encodes a non-negative integer in base 62."""
+
+    if value == 0:
+        return BASE62_ALPHABET[0]
+
+    chars = []
+    while value:
+        value, remainder = divmod(value, 62)
+        chars.append(BASE62_ALPHABET[remainder])
+    return "".join(reversed(chars))
+
+
+def decode_base62(key: str) -> int:
+    value = 0
+    for char in key:
+        value = value * 62 + BASE62_ALPHABET.index(char)
+    return value
+
+
+def _default_node_id() -> int:
+    seed = f"{socket.gethostname()}:{os.getpid()}".encode()
+    return zlib.crc32(seed) & MAX_NODE_ID
+
+
+class KeyGenerator:
+    """Snowflake-style generator of unique, time-ordered keys.
+
+    A key packs the time in milliseconds, the node ID and a per-millisecond sequence into
+    63 bits, and is encoded in base 62 (at most 11 characters). Keys never repeat within a
+    process: the clock is not allowed to go backwards, and after 4096 keys in one millisecond
+    the generator borrows the next millisecond. Keys of different processes differ as long
+    as their node IDs differ.
+
+    The node ID is `node_id` plus `worker_index`. A forked child inherits both from its parent,
+    so it must be given its own worker index with :meth:`set_worker_index` before it generates
+    keys, otherwise :meth:`next_id` raises RuntimeError. Without a configured node ID, the ID
+    is derived from host name and PID, which may collide; every forked child that falls back to
+    it logs a warning.
+
+    Args:
+        node_id: First node ID of this deployment, 0-1023. Defaults to `KEY_NODE_ID`
+        worker_index: Index of this process among the workers. Defaults to `KEY_WORKER_INDEX`, else 0
+    """
+
+    def __init__(self, node_id: Optional[int] = None, worker_index: Optional[int] = None):
+        if node_id is None:
+            node_id = key_config.KEY_NODE_ID
+        if worker_index is None:
+            worker_index = key_config.KEY_WORKER_INDEX
+
+        self.base_node_id = node_id
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+        self._inherited = False
+
+        self._set_node(worker_index)
+
+    def _set_node(self, worker_index: Optional[int]) -> None:
+        if self.base_node_id is None:
+            if worker_index is not None:
+                logger.warning("KEY_NODE_ID is not set, worker index %d is used as node ID", worker_index)
+            node_id = worker_index if worker_index is not None else _default_node_id()
+        else:
+            node_id = self.base_node_id + (worker_index or 0)
+
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"node_id must be between 0 and {MAX_NODE_ID}, got {node_id}")
+
+        self.worker_index = worker_index
+        self.node_id = node_id
+
+    def set_worker_index(self, worker_index: int) -> None:
+        """Gives this process its own node ID, call it in every worker before generating keys."""
+
+        with self._lock:
+            self._set_node(worker_index)
+            self._inherited = False
+
+    def reset_after_fork(self) -> None:
+        """Keeps a forked child from generating keys with its parent's node ID."""
+
+        self._lock = threading.Lock()
+
+        if self.base_node_id is None and self.worker_index is None:
+            self.node_id = _default_node_id()
+            logger.warning(
+                "KEY_NODE_ID is not set, notification keys of process %d use node ID %d derived from "
+                "host name and PID, which may collide with another process", os.getpid(), self.node_id
+            )
+        else:
+            # The configured ID belongs to the parent, the child has to be told its own index.
+            self._inherited = True
+
+    def next_id(self) -> int:
+        if self._inherited:
+            raise RuntimeError(
+                f"Process {os.getpid()} was forked with node ID {self.node_id} of its parent, "
+                "call key_generator.set_worker_index() in every worker before generating keys"
+            )
+
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000 - KEY_EPOCH_MS
+
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    self._last_ms += 1
+
+            return (self._last_ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node_id << SEQUENCE_BITS) | self._sequence
+
+    def next_key(self) -> str:
+        return encode_base62(self.next_id())
+
+
+key_generator = KeyGenerator()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=key_generator.reset_after_fork)
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from aiogram.filters.callback_data import CallbackData
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from aiogram_ext.keyboard.keys import encode_base62
+from aiogram_ext.storage.sqlite_storage.models import TableCallbackPayload
+from aiogram_ext.storage.sqlite_storage.writer import SqliteWriter, run_write
+
+logger = logging.getLogger(__name__)
+
+# Callbacks handled by the library itself (see aiogram_ext.notification.handlers), never replaced by tokens.
+LIBRARY_CALLBACKS = frozenset({"delete_notification", "clear_fsm_state"})
+
+
+class StoredCallback(CallbackData, prefix="cb"):
+    token: str
+
+
+class CallbackPayloadStore:
+    """Server-side store of callback payloads behind compact tokens.
+
+    A button carries `cb:<token>` (at most 14 bytes) instead of the payload, so payloads are
+    not limited to Telegram's 64 bytes. The token is derived from the payload, storing the same
+    payload again returns the same token and only extends its lifetime.
+
+    Payloads are kept in an LRU of at most `max_size` entries and written through to the sqlite
+    storage, lookups are O(1) and fall back to the database after eviction or a restart.
+    Resolve tokens in handlers with :class:`aiogram_ext.filters.stored_callback.StoredCallbackFilter`.
+
+    Args:
+        sqlite_session_pool: Session maker used for reading and persisting payloads
+        ttl: Lifetime of a stored payload in seconds (default: 7 days)
+        max_size: Maximum number of payloads kept in memory (default: 10000)
+        writer: Optional :class:`SqliteWriter`, see :func:`run_write`
+        purge_every: Delete expired rows from the database every this many writes (default: 1000)
+    """
+
+    def __init__(
+        self,
+        sqlite_session_pool: async_sessionmaker[AsyncSession],
+        ttl: float = 7 * 24 * 3600,
+        max_size: int = 10000,
+        writer: Optional[SqliteWriter] = None,
+        purge_every: int = 1000,
+    ):
+        self.sqlite_session_pool = sqlite_session_pool
+        self.ttl = ttl
+        self.max_size = max_size
+        self.writer = writer
+        self.purge_every = purge_every
+
+        self._cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._writes = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @staticmethod
+    def token_for(payload: str) -> str:
+        digest = hashlib.blake2b(payload.encode(), digest_size=8).digest()
+        return encode_base62(int.from_bytes(digest, "big"))
+
+    @staticmethod
+    def pack(token: str) -> str:
+        return StoredCallback(token=token).pack()
+
+    async def put(self, payload: str) -> str:
+        """Stores the payload, returns its token."""
+
+        return (await self.put_many([payload]))[0]
+
+    async def put_many(self, payloads: Iterable[str]) -> List[str]:
+        """Stores several payloads in one write, returns their tokens in order."""
+
+        now = time.time()
+        expires_at = now + self.ttl
+
+        tokens: List[str] = []
+        to_write: Dict[str, Tuple[str, float]] = {}
+
+        for payload in payloads:
+            token = self.token_for(payload)
+            tokens.append(token)
+
+            cached = self._cache.get(token)
+            # Re-rendered keyboards hit this path, the row is written again only once half the lifetime is used up.
+            if cached is not None and cached[1] - now > self.ttl / 2:
+                self._cache.move_to_end(token)
+                continue
+
+            to_write[token] = (payload, expires_at)
+
+        if to_write:
+            await self._write(to_write)
+            for token, entry in to_write.items():
+                self._remember(token, entry)
+
+        return tokens
+
+    async def get(self, token: str) -> Optional[str]:
+        """Returns the payload of the token, or None if it is unknown or expired."""
+
+        now = time.time()
+
+        if (entry := self._cache.get(token)) is None:
+            async with self.sqlite_session_pool() as sqlite_session:
+                row = await TableCallbackPayload.get_payload(token, sqlite_session)
+            if row is None:
+                return None
+            entry = (row.payload, row.expires_at)
+            self._remember(token, entry)
+        else:
+            self._cache.move_to_end(token)
+
+        payload, expires_at = entry
+        if expires_at < now:
+            self._cache.pop(token, None)
+            return None
+
+        return payload
+
+    async def purge_expired(self) -> int:
+        """Deletes expired payloads from memory and the database, returns the number of deleted rows."""
+
+        now = time.time()
+        for token in [token for token, (_, expires_at) in self._cache.items() if expires_at < now]:
+            del self._cache[token]
+
+        async def write(sqlite_session: AsyncSession) -> int:
+            return await TableCallbackPayload.delete_expired(now, sqlite_session)
+
+        return await run_write(self.sqlite_session_pool, self.writer, write)
+
+    def _remember(self, token: str, entry: Tuple[str, float]) -> None:
+        self._cache[token] = entry
+        self._cache.move_to_end(token)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    async def _write(self, payloads: Dict[str, Tuple[str, float]]) -> None:
+        async def write(sqlite_session: AsyncSession) -> None:
+            await TableCallbackPayload.save_payloads(payloads, sqlite_session)
+
+        await run_write(self.sqlite_session_pool, self.writer, write)
+
+        self._writes += 1
+        if self.purge_every and self._writes % self.purge_every == 0:
+            try:
+                deleted = await self.purge_expired()
+                logger.debug("CallbackPayloadStore purged %d expired payloads", deleted)
+            except Exception as e:
+                logger.warning("Error purging expired callback payloads: %s", e)
@@ -1,14 +1,18 @@
 import asyncio
+from collections import deque
 from enum import Enum
 import inspect
+import itertools
 import logging
+import re
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, Callable, Deque, Dict, Optional, List, Tuple
 
 from aiogram import Bot
 
 from aiogram_ext.bot.config import BotManager
+from aiogram_ext.bot.scheduler import Lane, outbound_lane
 from aiogram_ext.logger.config import log_config
 
 logger = logging.getLogger(__name__)
@@ -23,6 +27,21 @@ class LogLevel(str, Enum):
 
 VALID_LOG_LEVELS: List[str] = [level.value for level in LogLevel]
 
+
+class OverflowPolicy(str, Enum):
+    """What TelegramLogger does with a new entry when its queue is full."""
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    DROP_BELOW_LEVEL = "drop_below_level"
+    BLOCK = "block"
+
+# Telegram limit for the text of one message.
+MESSAGE_LIMIT = 4096
+
+# Tags, entities, whitespace and words: the pieces an HTML text may be split between.
+_HTML_TOKEN = re.compile(r"<[^>]*>|&#?\w+;|\s+|[^<&\s]+|[<&]")
+
 @dataclass
 class LogEntry:
     text: str
@@ -32,8 +51,117 @@ class LogEntry:
     chat_id: Optional[int] = None
 
 
+def _text_length(text: str) -> int:
+    """Length of the text as Telegram counts it, in UTF-16 code units."""
+
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _split_html(text: str, limit: int) -> List[str]:
+    """Splits an HTML text into parts of at most `limit` characters.
+
+    Parts end between words and never inside a tag or an entity. Tags that are open at the end
+    of a part are closed there and opened again at the start of the next one.
+    """
+
+    parts = []
+    open_tags: List[Tuple[str, str]] = []  # (name, opening tag)
+    current = ""
+
+    def closing(tags: List[Tuple[str, str]]) -> str:
+        return "".join(f"</{name}>" for name, _ in reversed(tags))
+
+    def reopening() -> str:
+        return "".join(tag for _, tag in open_tags)
+
+    for token in _HTML_TOKEN.findall(text):
+        tags = open_tags
+        if token.startswith("</"):
+            name = token[2:-1].strip().lower()
+            tags = list(open_tags)
+            for i in range(len(tags) - 1, -1, -1):
+                if tags[i][0] == name:
+                    del tags[i]
+                    break
+        elif token.startswith("<") and len(token) > 2:
+            tags = open_tags + [(re.split(r"[\s>]", token[1:], maxsplit=1)[0].lower(), token)]
+
+        if current and _text_length(current + token + closing(tags)) > limit:
+            parts.append(current + closing(open_tags))
+            current = reopening()
+
+        # A single word longer than a whole part is cut anywhere.
+        while _text_length(current + token + closing(tags)) > limit and not token.startswith(("<", "&")):
+            room = max(1, limit - _text_length(current + closing(tags)))
+            head = token[:room]
+            while _text_length(head) > room and len(head) > 1:
+                head = head[:-1]
+            parts.append(current + head + closing(tags))
+            current = reopening()
+            token = token[len(head):]
+
+        current += token
+        open_tags = tags
+
+    if current.strip():
+        parts.append(current)
+    return parts
+
+
+class _LogQueue(asyncio.Queue):
+    """asyncio.Queue that can also remove the oldest entry matching a condition.
+
+    The entries are kept in the subclass's own deque through the `_init`/`_put`/`_get` hooks.
+    """
+
+    def _init(self, maxsize: int) -> None:
+        self._entries: Deque[Dict[str, Any]] = deque()
+
+    def _put(self, item: Dict[str, Any]) -> None:
+        self._entries.append(item)
+
+    def _get(self) -> Dict[str, Any]:
+        return self._entries.popleft()
+
+    def qsize(self) -> int:
+        return len(self._entries)
+
+    def empty(self) -> bool:
+        return not self._entries
+
+    def evict(self, predicate: Callable[[Dict[str, Any]], bool]) -> bool:
+        """Removes the oldest entry for which `predicate` is true, returns False if there is none.
+
+        Like :meth:`get_nowait`, the removed entry still has to be marked with :meth:`task_done`.
+        """
+
+        for index, entry in enumerate(self._entries):
+            if predicate(entry):
+                del self._entries[index]
+                return True
+        return False
+
+
 class TelegramLogger:
     """Asynchronous logger for sending messages to Telegram chat.
+
+    The worker waits `linger` seconds after an entry arrives and then packs everything queued
+    so far into as few messages as possible: consecutive entries for the same chat share one
+    message of up to 4096 characters, under one header per level. An entry that does not fit
+    into one message is split between words, with its HTML tags closed and reopened.
+
+    The queue holds at most `max_queue_size` entries. When it is full, a new entry is handled
+    according to `overflow`:
+
+        - drop_oldest: the oldest queued entry is dropped.
+        - drop_newest: the new entry is dropped.
+        - drop_below_level: the new entry is dropped if its level is below `overflow_level`,
+          otherwise the oldest queued entry below `overflow_level` is dropped. If every queued
+          entry is at or above `overflow_level`, the new entry is dropped.
+        - block: :meth:`log` waits up to `block_timeout` seconds for room, then drops the new
+          entry. :meth:`log_nowait` never waits and drops it at once.
+
+    :meth:`metrics` counts queued, dropped, sent and failed entries.
     
     Args:
         bot: Telegram bot instance
@@ -41,8 +169,13 @@ class TelegramLogger:
         mention_admins: Mention admins if there are any errors (default: False)
         show_caller: Show call source (default: True)
         rate_limit_seconds: Delay between messages (default: 0.5)
-        batch_size: Batch size to send (default: 10)
+        batch_size: Maximum number of entries packed at once (default: 500)
         max_retries: Maximum number of sending attempts (default: 3)
+        linger: Time in seconds to wait for more entries before sending (default: 0.5)
+        max_queue_size: Maximum number of queued entries (default: 10000)
+        overflow: Overflow policy of the queue (default: drop_oldest)
+        overflow_level: Lowest level kept by the drop_below_level policy (default: warning)
+        block_timeout: Maximum wait in seconds of the block policy (default: 1.0)
     """
 
     def __init__(
@@ -52,8 +185,13 @@ class TelegramLogger:
         mention_admins: bool = False,
         show_caller: bool = True,
         rate_limit_seconds: float = 0.5,
-        batch_size: int = 10,
+        batch_size: int = 500,
         max_retries: int = 3,
+        linger: float = 0.5,
+        max_queue_size: int = 10000,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        overflow_level: LogLevel = LogLevel.WARNING,
+        block_timeout: float = 1.0,
     ):
         self.bot = bot
         self.chat_id = chat_id
@@ -62,8 +200,16 @@ class TelegramLogger:
         self.rate_limit_seconds = rate_limit_seconds
         self.batch_size = batch_size
         self.max_retries = max_retries
-
-        self.queue = asyncio.Queue()
+        self.linger = linger
+        self.overflow = OverflowPolicy(overflow)
+        self.overflow_level = LogLevel(overflow_level)
+        self.block_timeout = block_timeout
+
+        self.queue = _LogQueue(maxsize=max_queue_size)
+        self.queued = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
         self.worker_task: Optional[asyncio.Task] = None
         self._stopping = asyncio.Event()
 
@@ -94,6 +240,17 @@ class TelegramLogger:
             self.worker_task = asyncio.create_task(self._worker())
             logger.info("TelegramLogger background worker has been launched.")
 
+    def metrics(self) -> Dict[str, int]:
+        """Returns the number of entries waiting in the queue and the counters of queued, dropped, sent and failed entries."""
+
+        return {
+            "pending": self.queue.qsize(),
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
     async def _worker(self) -> None:
         """The main loop for processing logs from the queue."""
 
@@ -102,90 +259,146 @@ class TelegramLogger:
             await self._process_batch(batch)
 
     async def _get_batch_from_queue(self) -> List[LogEntry]:
-        """Receives a batch of messages from the queue."""
+        """Waits for an entry, lingers for more and takes up to `batch_size` queued entries."""
 
-        batch = []
-        try:
-            for _ in range(self.batch_size):
-                log_entry_dict = await asyncio.wait_for(self.queue.get(), timeout=1.0)
-                entry = LogEntry(**{
-                    **log_entry_dict,
-                    "level": LogLevel(log_entry_dict["level"])
-                })
-                batch.append(entry)
-        except (asyncio.TimeoutError, asyncio.CancelledError):
-            pass
-        return batch
+        items = [await self.queue.get()]
+        if self.linger > 0 and self.queue.qsize() < self.batch_size - 1 and not self._stopping.is_set():
+            await asyncio.sleep(self.linger)
+
+        while len(items) < self.batch_size and not self.queue.empty():
+            items.append(self.queue.get_nowait())
+
+        return [
+            LogEntry(**{**log_entry_dict, "level": LogLevel(log_entry_dict["level"])})
+            for log_entry_dict in items
+        ]
 
     async def _process_batch(self, batch: List[LogEntry]) -> None:
-        """Processes a batch of messages."""
+        """Packs a batch of entries into messages and sends them."""
 
-        for entry in batch:
-            try:
-                await self._send_with_retry(entry)
+        try:
+            for chat_id, text, count in self._pack(batch):
+                try:
+                    await self._send_with_retry(chat_id, text)
+                    self.sent += count
+                except Exception as e:
+                    self.failed += count
+                    logger.exception("Error sending log to Telegram after %d attempts: %s", self.max_retries, e)
                 await asyncio.sleep(self.rate_limit_seconds)
-            except Exception as e:
-                logger.exception("Error sending log to Telegram after %d attempts: %s", self.max_retries, e)
-            finally:
+        finally:
+            for _ in batch:
                 self.queue.task_done()
 
-    async def _send_with_retry(self, entry: LogEntry) -> None:
+    async def _send_with_retry(self, chat_id: int, text: str) -> None:
         """Sends a retry message."""
 
         for attempt in range(self.max_retries):
             try:
-                await self._send_to_telegram(entry)
+                await self._send_to_telegram(chat_id, text)
                 return
             except Exception:
                 if attempt == self.max_retries - 1:
                     raise
                 await asyncio.sleep(1 * (attempt + 1))
 
-    async def _send_to_telegram(self, entry: LogEntry) -> None:
+    async def _send_to_telegram(self, chat_id: int, text: str) -> None:
         """Sends a formatted message to Telegram."""
-        formatted_text = self._format_message(entry)
 
         try:
-            await self.bot.send_message(
-                chat_id=entry.chat_id or self.chat_id,
-                text=formatted_text
-            )
+            with outbound_lane(Lane.BULK):
+                await self.bot.send_message(chat_id=chat_id, text=text)
         except Exception as e:
             logger.error("Error sending message in Telegram: '%s'", e)
             raise
 
-    def _format_message(self, entry: LogEntry) -> str:
-        """Formats a message for sending in Telegram."""
+    def _pack(self, batch: List[LogEntry]) -> List[Tuple[int, str, int]]:
+        """Packs consecutive entries for the same chat into (chat_id, text, number of entries) messages."""
+
+        messages = []
+        for chat_id, entries in itertools.groupby(batch, key=lambda entry: entry.chat_id or self.chat_id):
+            messages.extend((chat_id, text, count) for text, count in self._pack_entries(list(entries)))
+        return messages
+
+    def _pack_entries(self, entries: List[LogEntry]) -> List[Tuple[str, int]]:
+        """Formats entries for one chat into (text, number of entries) of at most 4096 characters.
+
+        An entry split between several texts is counted in its last one.
+        """
+
+        budget = MESSAGE_LIMIT - _text_length(self._format_mentions(entries))
+        texts = []
+        body, body_entries, level = "", [], None
+
+        def flush() -> None:
+            if body_entries:
+                texts.append((body + self._format_mentions(body_entries), len(body_entries)))
+
+        for entry in entries:
+            header = f"<b>{entry.level.upper()}</b>\n"
+            line = self._format_entry(entry)
+
+            if entry.level == level and body:
+                piece = "\n" + line
+            else:
+                piece = ("\n\n" if body else "") + header + line
 
-        parts = [f"<b>{entry.level.upper()}</b>"]
+            if _text_length(body + piece) <= budget:
+                body += piece
+                body_entries.append(entry)
+                level = entry.level
+                continue
+
+            flush()
+            if _text_length(header + line) <= budget:
+                body, body_entries, level = header + line, [entry], entry.level
+                continue
+
+            parts = _split_html(line, budget - _text_length(header))
+            texts.extend((header + part + self._format_mentions([entry]), 0) for part in parts[:-1])
+            body, body_entries, level = header + parts[-1], [entry], entry.level
+
+        flush()
+        return texts
+
+    def _format_entry(self, entry: LogEntry) -> str:
+        """Formats one entry as a line of a message."""
 
         if self.show_caller and entry.caller:
-            parts.append(f"[{entry.caller}]")
+            return f"[{entry.caller}]: {entry.text}"
+        return entry.text
 
-        parts.append(f":\n{entry.text}")
+    def _format_mentions(self, entries: List[LogEntry]) -> str:
+        """Formats the mentions that the entries of one message call for."""
 
-        if (entry.level in log_config.NOTIFY_ADMINS_LEVELS or entry.notify_admins) and self.mention_admins:
+        parts = []
+
+        if self.mention_admins and any(
+            entry.level in log_config.NOTIFY_ADMINS_LEVELS or entry.notify_admins for entry in entries
+        ):
             admins_mentions = log_config.get_admins_mentions()
             if admins_mentions:
                 parts.append(f"\n\n⚠️ {admins_mentions}")
 
-        if entry.level in log_config.NOTIFY_MODERATORS_LEVELS:
+        if any(entry.level in log_config.NOTIFY_MODERATORS_LEVELS for entry in entries):
             moders_mentions = log_config.get_moderators_mentions()
             if moders_mentions:
                 parts.append(f"\n\n👮 {moders_mentions}")
 
         return "".join(parts)
 
-    def _get_caller_info(self) -> str:
-        """Gets information about the calling code."""
+    def _get_caller_info(self, stacklevel: int) -> str:
+        """Gets information about the calling code.
+
+        `stacklevel` counts frames from the logger method that calls this one, 1 being its caller.
+        """
 
         if not self.show_caller:
             return ""
 
         frame = inspect.currentframe()
         try:
-            # Move up 3 frames to skip logger methods
-            for _ in range(3):
+            # Skip this method and the logger method that called it
+            for _ in range(stacklevel + 1):
                 if frame:
                     frame = frame.f_back
 
@@ -209,59 +422,133 @@ class TelegramLogger:
         message: str,
         level: LogLevel,
         notify_admins: bool = False,
-        chat_id: Optional[int] = None
-    ) -> None:
-        """The main logging method."""
+        chat_id: Optional[int] = None,
+        stacklevel: int = 1
+    ) -> bool:
+        """The main logging method.
+
+        Returns False if the entry was dropped because the queue is full. Wrappers around this
+        method pass a higher `stacklevel`, so the caller shown is their own caller.
+        """
+
+        caller = self._get_caller_info(stacklevel) if self.show_caller else ""
+        item = self._make_item(message, level, notify_admins, chat_id, caller)
+
+        if self.overflow != OverflowPolicy.BLOCK or not self.queue.full():
+            return self._enqueue(item)
+
+        try:
+            await asyncio.wait_for(self.queue.put(item), timeout=self.block_timeout)
+        except asyncio.TimeoutError:
+            self._drop()
+            return False
+
+        self.queued += 1
+        return True
+
+    def log_nowait(
+        self,
+        message: str,
+        level: LogLevel,
+        notify_admins: bool = False,
+        chat_id: Optional[int] = None,
+        stacklevel: int = 1
+    ) -> bool:
+        """Logging method for code that cannot await, never waits for room in the queue.
+
+        Returns False if the entry was dropped because the queue is full.
+        """
+
+        caller = self._get_caller_info(stacklevel) if self.show_caller else ""
+        return self._enqueue(self._make_item(message, level, notify_admins, chat_id, caller))
+
+    def _make_item(
+        self,
+        message: str,
+        level: LogLevel,
+        notify_admins: bool,
+        chat_id: Optional[int],
+        caller: str
+    ) -> Dict[str, Any]:
+        """Validates the level, writes the entry to the local log and builds the queue item."""
 
         if level not in VALID_LOG_LEVELS:
             raise ValueError(f"Invalid logging level: {level}. Valid: {VALID_LOG_LEVELS}")
 
-        caller = self._get_caller_info() if self.show_caller else ""
         full_message = f"[{caller}] {message}" if caller else message
         getattr(logger, level)(full_message)
 
-        await self.queue.put({
+        return {
             'text': message,
             'level': level,
             'notify_admins': notify_admins,
             'caller': caller,
             'chat_id': chat_id
-        })
-
-    async def debug(self, message: str, chat_id: Optional[int] = None) -> None:
+        }
+
+    def _enqueue(self, item: Dict[str, Any]) -> bool:
+        """Queues the item without waiting, applying the overflow policy if the queue is full."""
+
+        if self.queue.full():
+            if self.overflow == OverflowPolicy.DROP_OLDEST:
+                self.queue.get_nowait()
+            elif self.overflow == OverflowPolicy.DROP_BELOW_LEVEL and not self._below_level(item):
+                if not self.queue.evict(self._below_level):
+                    self._drop()
+                    return False
+            else:
+                self._drop()
+                return False
+
+            self.queue.task_done()
+            self._drop()
+
+        self.queue.put_nowait(item)
+        self.queued += 1
+        return True
+
+    def _below_level(self, item: Dict[str, Any]) -> bool:
+        return VALID_LOG_LEVELS.index(item["level"]) < VALID_LOG_LEVELS.index(self.overflow_level)
+
+    def _drop(self) -> None:
+        self.dropped += 1
+        if self.dropped % 1000 == 1:
+            logger.warning("TelegramLogger queue is full, %d entries dropped so far", self.dropped)
+
+    async def debug(self, message: str, chat_id: Optional[int] = None) -> bool:
         """Logs DEBUG level message."""
-        await self.log(message, "debug", chat_id=chat_id)
+        return await self.log(message, "debug", chat_id=chat_id, stacklevel=2)
 
-    async def info(self, message: str, chat_id: Optional[int] = None) -> None:
+    async def info(self, message: str, chat_id: Optional[int] = None) -> bool:
         """Logs INFO level message."""
-        await self.log(message, "info", chat_id=chat_id)
+        return await self.log(message, "info", chat_id=chat_id, stacklevel=2)
 
     async def warning(
         self,
         message: str,
         notify_admins: bool = True,
         chat_id: Optional[int] = None
-    ) -> None:
+    ) -> bool:
         """Logs WARNING level message."""
-        await self.log(message, "warning", notify_admins, chat_id)
+        return await self.log(message, "warning", notify_admins, chat_id, stacklevel=2)
 
     async def error(
         self,
         message: str,
         notify_admins: bool = True,
         chat_id: Optional[int] = None
-    ) -> None:
+    ) -> bool:
         """Logs ERROR level message."""
-        await self.log(message, "error", notify_admins, chat_id)
+        return await self.log(message, "error", notify_admins, chat_id, stacklevel=2)
 
     async def critical(
         self,
         message: str,
         notify_admins: bool = True,
         chat_id: Optional[int] = None
-    ) -> None:
+    ) -> bool:
         """Logs CRITICAL level message."""
-        await self.log(message, "critical", notify_admins, chat_id)
+        return await self.log(message, "critical", notify_admins, chat_id, stacklevel=2)
 
 
 bot = BotManager.get_bot()
@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, FSInputFile, InputFile, InputMediaPhoto, InputMediaVideo, Message
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from aiogram_ext.storage.sqlite_storage.models import TableMediaFile
+from aiogram_ext.storage.sqlite_storage.writer import SqliteWriter, run_write
+
+logger = logging.getLogger(__name__)
+
+InputMedia = Union[InputMediaPhoto, InputMediaVideo]
+
+# Files and buffers from this size on are hashed in a worker thread, files through a memory map.
+LARGE_CONTENT = 1 << 20
+# Large files are mapped this many bytes at a time (a multiple of mmap.ALLOCATIONGRANULARITY).
+MMAP_WINDOW = 64 << 20
+
+# Number of paths whose content hash is remembered.
+PATH_HASHES_SIZE = 4096
+
+# LRU of path -> (mtime_ns, size, hash), a file is only read again after it changed on disk.
+_path_hashes: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+
+
+def _hash_bytes(data: Union[bytes, memoryview, mmap.mmap]) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _hash_path(path: str, size: int) -> str:
+    with open(path, "rb") as file:
+        if size < LARGE_CONTENT:
+            return _hash_bytes(file.read())
+
+        # The file is paged in by the kernel window by window, it is never copied into memory in full.
+        digest = hashlib.blake2b(digest_size=16)
+        for offset in range(0, size, MMAP_WINDOW):
+            length = min(MMAP_WINDOW, size - offset)
+            with mmap.mmap(file.fileno(), length, access=mmap.ACCESS_READ, offset=offset) as window:
+                digest.update(window)
+        return digest.hexdigest()
+
+
+async def file_content_hash(path: Union[str, os.PathLike]) -> str:
+    """Returns the content hash of a local file, memoized until the file changes.
+
+    The hashes of the last `PATH_HASHES_SIZE` paths are kept.
+    """
+
+    path = os.fspath(path)
+    stat = os.stat(path)
+    cached = _path_hashes.get(path)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        _path_hashes.move_to_end(path)
+        return cached[2]
+
+    if stat.st_size < LARGE_CONTENT:
+        content_hash = _hash_path(path, stat.st_size)
+    else:
+        content_hash = await asyncio.to_thread(_hash_path, path, stat.st_size)
+
+    _path_hashes[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+    _path_hashes.move_to_end(path)
+    while len(_path_hashes) > PATH_HASHES_SIZE:
+        _path_hashes.popitem(last=False)
+    return content_hash
+
+
+class FileIdCache:
+    """Content-addressed cache of telegram file_ids for uploaded media.
+
+    Local files and byte buffers are hashed (blake2b) and sent by file_id once the same
+    content was uploaded by the same bot, so any content is uploaded only once. Concurrent
+    sends of new content share one upload. Entries are kept in an LRU of at most `max_size`
+    entries and written through to the sqlite storage, so they survive restarts.
+
+    Args:
+        sqlite_session_pool: Session maker used for reading and persisting file_ids
+        max_size: Maximum number of file_ids kept in memory (default: 10000)
+        writer: Optional :class:`SqliteWriter`, see :func:`run_write`
+    """
+
+    def __init__(
+        self,
+        sqlite_session_pool: async_sessionmaker[AsyncSession],
+        max_size: int = 10000,
+        writer: Optional[SqliteWriter] = None,
+    ):
+        self.sqlite_session_pool = sqlite_session_pool
+        self.max_size = max_size
+        self.writer = writer
+
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @staticmethod
+    async def content_key(bot: Bot, media_type: str, media: Union[str, InputFile]) -> Optional[str]:
+        """Returns the cache key of a local file or buffer, None for file_ids, URLs and streams."""
+
+        if isinstance(media, FSInputFile):
+            content_hash = await file_content_hash(media.path)
+
+        elif isinstance(media, BufferedInputFile):
+            if len(media.data) < LARGE_CONTENT:
+                content_hash = _hash_bytes(media.data)
+            else:
+                content_hash = await asyncio.to_thread(_hash_bytes, media.data)
+
+        else:
+            return None
+
+        # file_ids are only valid for the bot that uploaded the file.
+        return f"{bot.id}:{getattr(media_type, 'value', media_type)}:{content_hash}"
+
+    @staticmethod
+    def file_id_of(message: Message, media_type: str) -> Optional[str]:
+        """Returns the file_id of the media in a sent message."""
+
+        media = getattr(message, getattr(media_type, "value", media_type), None)
+        if isinstance(media, list):
+            media = media[-1] if media else None
+        return getattr(media, "file_id", None)
+
+    async def get(self, content_key: str) -> Optional[str]:
+        """Returns the cached file_id, or None if the content was never uploaded."""
+
+        if (file_id := self._cache.get(content_key)) is not None:
+            self._cache.move_to_end(content_key)
+            return file_id
+
+        async with self.sqlite_session_pool() as sqlite_session:
+            file_id = await TableMediaFile.get_file_id(content_key, sqlite_session)
+
+        if file_id is not None:
+            self._remember(content_key, file_id)
+        return file_id
+
+    async def put(self, file_ids: Dict[str, str]) -> None:
+        """Stores content_key -> file_id entries in memory and in the database."""
+
+        if not file_ids:
+            return
+
+        for content_key, file_id in file_ids.items():
+            self._remember(content_key, file_id)
+
+        async def write(sqlite_session: AsyncSession) -> None:
+            await TableMediaFile.save_file_ids(file_ids, sqlite_session)
+
+        try:
+            await run_write(self.sqlite_session_pool, self.writer, write)
+
+        except Exception as e:
+            logger.warning("Error persisting media file_ids: %s", e)
+
+    async def send(
+        self,
+        bot: Bot,
+        media_type: str,
+        media: Union[str, InputFile],
+        send: Callable[[Union[str, InputFile]], Awaitable[Message]],
+    ) -> Message:
+        """Sends one media through `send`, by file_id when the content was uploaded before."""
+
+        content_key = await self.content_key(bot, media_type, media)
+        if content_key is None:
+            return await send(media)
+
+        file_id = await self.get(content_key)
+        if file_id is None and (future := self._inflight.get(content_key)) is not None:
+            try:
+                file_id = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                file_id = None
+            except Exception:
+                file_id = None
+
+        if file_id is not None:
+            try:
+                return await send(file_id)
+            except TelegramBadRequest as e:
+                if "file" not in e.message.lower():
+                    raise
+                logger.info("Cached file_id of %s is no longer valid, uploading again: %s", content_key, e.message)
+                self._cache.pop(content_key, None)
+
+        return await self._upload(content_key, media_type, media, send)
+
+    async def prepare(self, bot: Bot, media: Sequence[InputMedia]) -> Tuple[List[InputMedia], List[Optional[str]]]:
+        """Replaces already uploaded content in an album by file_ids.
+
+        Returns the album and, for every item that still has to be uploaded, its cache key.
+        """
+
+        prepared: List[InputMedia] = []
+        upload_keys: List[Optional[str]] = []
+
+        for item in media:
+            content_key = await self.content_key(bot, item.type, item.media)
+            file_id = await self.get(content_key) if content_key is not None else None
+
+            if file_id is not None:
+                prepared.append(item.model_copy(update={"media": file_id}))
+                upload_keys.append(None)
+            else:
+                prepared.append(item)
+                upload_keys.append(content_key)
+
+        return prepared, upload_keys
+
+    async def remember(
+        self,
+        media: Sequence[InputMedia],
+        upload_keys: Sequence[Optional[str]],
+        messages: Sequence[Message]
+    ) -> None:
+        """Stores the file_ids of the uploaded album items, `messages` are in album order."""
+
+        file_ids = {}
+        for item, content_key, message in zip(media, upload_keys, messages):
+            if content_key is not None and (file_id := self.file_id_of(message, item.type)) is not None:
+                file_ids[content_key] = file_id
+
+        await self.put(file_ids)
+
+    async def _upload(
+        self,
+        content_key: str,
+        media_type: str,
+        media: Union[str, InputFile],
+        send: Callable[[Union[str, InputFile]], Awaitable[Message]],
+    ) -> Message:
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[content_key] = future
+        try:
+            message = await send(media)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # marks it retrieved when nobody is waiting
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            if self._inflight.get(content_key) is future:
+                del self._inflight[content_key]
+
+        file_id = self.file_id_of(message, media_type)
+        future.set_result(file_id)
+        if file_id is not None:
+            await self.put({content_key: file_id})
+
+        return message
+
+    def _remember(self, content_key: str, file_id: str) -> None:
+        self._cache[content_key] = file_id
+        self._cache.move_to_end(content_key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
@@ -1,17 +1,41 @@
-from aiogram.types import InputMediaPhoto, InputMediaVideo
+import os
+from pathlib import Path
+from typing import Union
+
+from aiogram.types import BufferedInputFile, FSInputFile, InputFile, InputMediaPhoto, InputMediaVideo
+
+# file_id or URL, a local path or raw bytes.
+MediaContent = Union[str, os.PathLike, bytes, bytearray, memoryview, InputFile]
 
 
 class NotificationMedia:
 
     @staticmethod
-    def create_input_media(media_type: str, file_id: str) -> InputMediaPhoto | InputMediaVideo:
+    def input_file(content: MediaContent, filename: str = "file") -> Union[str, InputFile]:
+        """Returns a file_id unchanged, wraps local paths and bytes into an InputFile for uploading."""
+
+        if isinstance(content, (str, InputFile)):
+            return content
+
+        if isinstance(content, os.PathLike):
+            return FSInputFile(Path(content))
+
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return BufferedInputFile(bytes(content), filename=filename)
+
+        raise ValueError("Unsupported media content")
+
+    @staticmethod
+    def create_input_media(media_type: str, file_id: MediaContent) -> InputMediaPhoto | InputMediaVideo:
         """Creates an InputMedia object based on the type."""
 
+        media = NotificationMedia.input_file(file_id, filename=media_type)
+
         if media_type == "photo":
-            return InputMediaPhoto(type=media_type, media=file_id)
+            return InputMediaPhoto(type=media_type, media=media)
 
         elif media_type == "video":
-            return InputMediaVideo(type=media_type, media=file_id)
+            return InputMediaVideo(type=media_type, media=media)
 
         else:
             raise ValueError("Unsupported media type")
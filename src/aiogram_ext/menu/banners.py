@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from aiogram import Bot
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from aiogram_ext.media.file_cache import file_content_hash
+from aiogram_ext.storage.sqlite_storage.models import TableMenu
+
+logger = logging.getLogger(__name__)
+
+
+class BannerUploader:
+    """Uploads menu banners, concurrent requests for the same menu share one upload."""
+
+    _inflight: Dict[str, asyncio.Future] = {}
+
+    @classmethod
+    async def ensure(
+        cls,
+        name: str,
+        path: str,
+        text: str,
+        bot: Bot,
+        sqlite_session: AsyncSession,
+        verify: bool = False,
+    ) -> Optional[Tuple[str, str]]:
+        """Returns (file_id, caption) of the banner, uploading it when it is missing.
+
+        With `verify`, a banner whose file changed since its upload is uploaded again
+        and an outdated caption is updated.
+        """
+
+        if (future := cls._inflight.get(name)) is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        cls._inflight[name] = future
+        try:
+            result = await cls._ensure(name, path, text, bot, sqlite_session, verify)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # marks it retrieved when nobody is waiting
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            cls._inflight.pop(name, None)
+
+    @staticmethod
+    async def _ensure(
+        name: str,
+        path: str,
+        text: str,
+        bot: Bot,
+        sqlite_session: AsyncSession,
+        verify: bool,
+    ) -> Optional[Tuple[str, str]]:
+        record = await TableMenu.get_by_menu_name(name, sqlite_session)
+
+        if record is not None and record.file_id and not verify:
+            return record.file_id, record.text
+
+        banner_hash = await file_content_hash(path)
+
+        if record is not None and record.file_id and record.banner_hash == banner_hash:
+            if record.text != text:
+                record.text = text
+            return record.file_id, record.text
+
+        logger.info("Uploading banner of menu '%s' from '%s'", name, path)
+        record = await TableMenu.store_and_get(
+            path=path,
+            name=name,
+            text=text,
+            sqlite_session=sqlite_session,
+            bot=bot,
+            banner_hash=banner_hash
+        )
+        if record is None or not record.file_id:
+            return None
+
+        return record.file_id, record.text
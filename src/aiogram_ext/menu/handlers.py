@@ -1,6 +1,5 @@
 import logging
 
-from aiogram import Router
 from aiogram.types import InputMediaPhoto
 from aiogram.filters import Command
 
@@ -8,10 +7,11 @@ from aiogram_ext.enums.notification_type import NotificationType
 from aiogram_ext.notification.notification import Notification
 from aiogram_ext.menu.callback import MenuCallBack
 from aiogram_ext.menu.registry import MenuRegistry
+from aiogram_ext.routing.callback_router import CallbackRouter
 
 logger = logging.getLogger(__name__)
 
-menu = Router()
+menu = CallbackRouter(name="menu")
 
 
 @menu.message(Command("menu"))
@@ -22,12 +22,14 @@ async def menu_command_handler(notification: Notification):
         content, keyboard = await MenuRegistry.create(
             sqlite_session=notification.sqlite_session,
             bot=notification.bot,
-            name="main"
+            name="main",
+            payload_store=notification.payload_store
         )
 
         if isinstance(content, InputMediaPhoto):
             await notification.send(
                 NotificationType.START_MENU,
+                msg=content.caption,
                 media=content,
                 media_caption=content.caption,
                 kbd=keyboard
@@ -36,6 +38,7 @@ async def menu_command_handler(notification: Notification):
         elif isinstance(content, str):
             await notification.send(
                 NotificationType.START_MENU,
+                msg=content,
                 kbd=keyboard
             )
 
@@ -46,13 +49,14 @@ async def menu_command_handler(notification: Notification):
         logger.error("Error calling menu_command_handler: %s", e, exc_info=True)
 
 
-@menu.callback_query(MenuCallBack.filter())
+@menu.callback(callback_data=MenuCallBack)
 async def menu_callback_handler(notification: Notification, callback_data: MenuCallBack):
     try:
         content, keyboard = await MenuRegistry.create(
             sqlite_session=notification.sqlite_session,
             bot=notification.bot,
             name=callback_data.name,
+            payload_store=notification.payload_store
         )
 
         if isinstance(content, InputMediaPhoto):
@@ -65,6 +69,7 @@ async def menu_callback_handler(notification: Notification, callback_data: MenuC
         elif isinstance(content, str):
             await notification.send(
                 NotificationType.EDIT_MENU,
+                msg=content,
                 kbd=keyboard
             )
 
@@ -74,5 +79,5 @@ async def menu_callback_handler(notification: Notification, callback_data: MenuC
         await notification.callback.answer()
 
     except Exception as e:
-        print(e)
+        logger.error("Error calling menu_callback_handler: %s", e, exc_info=True)
         await notification.callback.answer("An error occurred")
@@ -5,6 +5,8 @@ from aiogram import Bot
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from aiogram_ext.keyboard.payload_store import LIBRARY_CALLBACKS, CallbackPayloadStore
+from aiogram_ext.menu.banners import BannerUploader
 from aiogram_ext.storage.sqlite_storage.models import TableMenu
 from aiogram_ext.menu.callback import MenuCallBack
 
@@ -16,9 +18,10 @@ ButtonDict = Dict[str, Union[str, int]]
 
 
 class Menu:
-    def __init__(self, sqlite_session: AsyncSession, bot: Bot):
+    def __init__(self, sqlite_session: AsyncSession, bot: Bot, payload_store: Optional[CallbackPayloadStore] = None):
         self.sqlite_session = sqlite_session
         self.bot = bot
+        self.payload_store = payload_store
 
     async def _get_banner_media(
         self,
@@ -30,38 +33,45 @@ class Menu:
             return None
 
         try:
+            if isinstance(banner, str):
+                stored = await BannerUploader.ensure(name, banner, text, self.bot, self.sqlite_session)
+                if stored is not None:
+                    file_id, caption = stored
+                    return InputMediaPhoto(media=file_id, caption=caption)
+                return None
+
             banner_obj = await TableMenu.get_by_menu_name(name, self.sqlite_session)
             if banner_obj and banner_obj.file_id:
                 return InputMediaPhoto(media=banner_obj.file_id, caption=banner_obj.text)
 
-            if isinstance(banner, str):
-                banner_obj = await TableMenu.store_and_get(
-                    path=banner,
-                    name=name,
-                    text=text,
-                    sqlite_session=self.sqlite_session,
-                    bot=self.bot
-                )
-                if banner_obj and banner_obj.file_id:
-                    return InputMediaPhoto(media=banner_obj.file_id, caption=banner_obj.text)
-
         except Exception as e:
             logger.warning(f"Cannot get banner for menu '{name}': {e}")
             return None
 
-    def _build_keyboard(
+    async def _build_keyboard(
         self,
         buttons: List[ButtonDict],
         adjust: Tuple[int, ...],
     ) -> InlineKeyboardMarkup:
         kb = InlineKeyboardBuilder()
 
+        tokens = {}
+        if self.payload_store is not None:
+            payloads = [
+                str(btn["callback_data"]) for btn in buttons
+                if "url" not in btn and "callback_data" in btn and str(btn["callback_data"]) not in LIBRARY_CALLBACKS
+            ]
+            tokens = dict(zip(payloads, await self.payload_store.put_many(payloads)))
+
         for btn in buttons:
             if "url" in btn:
                 kb.add(InlineKeyboardButton(text=btn["text"], url=btn["url"]))
 
             elif "callback_data" in btn:
-                kb.add(InlineKeyboardButton(text=btn["text"], callback_data=btn["callback_data"]))
+                data = str(btn["callback_data"])
+                if data in tokens:
+                    data = self.payload_store.pack(tokens[data])
+                kb.add(InlineKeyboardButton(text=btn["text"], callback_data=data))
 
             elif "name" in btn:
                 cb = MenuCallBack(name=btn["name"]).pack()
@@ -81,7 +91,7 @@ class Menu:
         adjust: Tuple[int, ...] = (1,),
     ) -> Tuple[Union[str, InputMediaPhoto], InlineKeyboardMarkup]:
 
-        keyboard = self._build_keyboard(buttons, adjust)
+        keyboard = await self._build_keyboard(buttons, adjust)
 
         if banner:
             image = await self._get_banner_media(name, text, banner)
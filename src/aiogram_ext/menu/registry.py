@@ -1,20 +1,29 @@
+import asyncio
 import importlib
 import logging
 import pkgutil
+import time
 from typing import Optional, Tuple, Union, List, Dict
 
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto
 
+from aiogram_ext.keyboard.payload_store import CallbackPayloadStore
+from aiogram_ext.menu.banners import BannerUploader
 from aiogram_ext.menu.menu import Menu
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 logger = logging.getLogger(__name__)
 
 
+MenuRender = Tuple[Union[str, InputMediaPhoto], InlineKeyboardMarkup]
+
+
 class MenuRegistry:
     _registry: dict[str, dict] = {}
+    # name -> (payload store, render, expires_at). Renders are shared between calls and must not be mutated.
+    _renders: dict[str, Tuple[Optional[CallbackPayloadStore], MenuRender, Optional[float]]] = {}
 
     @classmethod
     def register(
@@ -39,6 +48,16 @@ class MenuRegistry:
             "banner": banner,
             "adjust": adjust,
         }
+        cls._renders.pop(name, None)
+
+    @classmethod
+    def invalidate(cls, name: Optional[str] = None):
+        """Сбрасывает готовое меню `name` (или все меню), например после смены баннера."""
+
+        if name is None:
+            cls._renders.clear()
+        else:
+            cls._renders.pop(name, None)
 
     @classmethod
     def auto_discover(cls, package: str):
@@ -58,25 +77,80 @@ class MenuRegistry:
                 except Exception as e:
                     logger.warning(f"Ошибка импорта модуля {modname}: {e}")
 
+    @classmethod
+    async def warm_up(
+        cls,
+        bot: Bot,
+        sqlite_session_pool: async_sessionmaker[AsyncSession],
+        concurrency: int = 4
+    ) -> Dict[str, bool]:
+        """
+        Загружает баннеры всех зарегистрированных меню заранее, до первых запросов пользователей.
+
+        Вызывается после `auto_discover`. Отсутствующие и изменившиеся (по хешу файла) баннеры
+        загружаются заново, не более `concurrency` одновременно. Возвращает {имя меню: баннер готов}.
+        """
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def warm(name: str, data: dict) -> bool:
+            async with semaphore:
+                try:
+                    async with sqlite_session_pool() as sqlite_session:
+                        async with sqlite_session.begin():
+                            stored = await BannerUploader.ensure(
+                                name, data["banner"], data["text"], bot, sqlite_session, verify=True
+                            )
+                except Exception as e:
+                    logger.warning("Cannot warm up banner for menu '%s': %s", name, e)
+                    return False
+
+                cls.invalidate(name)
+                return stored is not None
+
+        menus = {name: data for name, data in cls._registry.items() if isinstance(data.get("banner"), str)}
+        results = await asyncio.gather(*(warm(name, data) for name, data in menus.items()))
+
+        ready = dict(zip(menus, results))
+        logger.info("Menu banners warmed up: %d of %d ready", sum(ready.values()), len(ready))
+        return ready
+
     @classmethod
     async def create(
         cls,
         sqlite_session: AsyncSession,
         bot: Bot,
-        name: str
+        name: str,
+        payload_store: Optional[CallbackPayloadStore] = None
     ) -> Tuple[Optional[InputMediaPhoto], InlineKeyboardMarkup]:
-        """Создаёт меню (медиа или сообщение с клавиатурой) по зарегистрированным данным."""
+        """Создаёт меню (медиа или сообщение с клавиатурой) по зарегистрированным данным.
+
+        Меню собирается один раз и дальше отдаётся из памяти, без запросов к БД.
+        """
+
+        cached = cls._renders.get(name)
+        if cached is not None:
+            store, render, expires_at = cached
+            if store is payload_store and (expires_at is None or expires_at > time.time()):
+                return render
 
         try:
             data = cls._registry[name]
         except KeyError:
             raise ValueError(f"Menu for name='{name}' not registered.")
 
-        menu = Menu(sqlite_session, bot)
-        return await menu.create(
+        menu = Menu(sqlite_session, bot, payload_store)
+        render = await menu.create(
             name=name,
             text=data["text"],
             buttons=data["buttons"],
             banner=data.get("banner", False),
             adjust=data.get("adjust", (1,))
         )
+
+        # A missing banner is retried on the next call. Stored callback tokens are refreshed before they expire.
+        if render[0] is not None and cls._registry.get(name) is data:
+            expires_at = time.time() + payload_store.ttl / 2 if payload_store is not None else None
+            cls._renders[name] = (payload_store, render, expires_at)
+
+        return render
@@ -0,0 +1,227 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Union
+
+from aiogram.types import Message
+
+from aiogram_ext.middlewares.media import AlbumBackend, AlbumBuffer
+
+logger = logging.getLogger(__name__)
+
+# Messages travel as one JSON line each, an album of 10 captioned parts stays well below this.
+LINE_LIMIT = 4 * 1024 * 1024
+
+
+class AlbumServer:
+    """Collects the albums of several worker processes in one place.
+
+    The workers forward every part of an album over a unix socket with :class:`SocketAlbumBackend`.
+    The server keeps the parts in an :class:`AlbumBuffer`, so an album is complete under the same
+    rules as in a single process, and answers the worker that sent the first part with the whole
+    album. Every other part is answered at once with nothing to handle.
+
+    Run exactly one server per bot, in a process that lives at least as long as the workers.
+
+    Args:
+        path: Path of the unix socket
+        buffer: Optional :class:`AlbumBuffer` with custom limits
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], buffer: Optional[AlbumBuffer] = None):
+        self.path = os.fspath(path)
+        self.buffer = buffer or AlbumBuffer()
+        self.dropped = 0
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+    async def start(self) -> None:
+        """Starts listening on the socket, a stale socket file is replaced."""
+
+        if self._server is not None:
+            return
+
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path, limit=LINE_LIMIT)
+        logger.info("AlbumServer is listening on %s", self.path)
+
+    async def stop(self) -> None:
+        """Stops the server, the workers collect the albums that are still open locally."""
+
+        if self._server is None:
+            return
+
+        self._server.close()
+        for writer in self._connections:
+            writer.close()
+        await self._server.wait_closed()
+        self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        logger.info("AlbumServer has been stopped.")
+
+    def metrics(self) -> Dict[str, int]:
+        """Returns the counters of the buffer and the number of albums whose worker disconnected."""
+
+        return {**self.buffer.metrics(), "dropped_albums": self.dropped}
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks = set()
+        self._connections.add(writer)
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                task = asyncio.create_task(self._answer(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception as e:
+            logger.error("AlbumServer connection failed: %s", e)
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _answer(self, request: Dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        try:
+            message = Message.model_validate(request["message"])
+            album = await self.buffer.collect(message)
+        except Exception as e:
+            logger.error("AlbumServer cannot collect part: %s", e, exc_info=True)
+            answer = {"id": request["id"], "error": str(e)}
+        else:
+            if album is not None:
+                album = [part.model_dump(mode="json", exclude_none=True) for part in album]
+            if writer.is_closing():
+                if album is not None:
+                    self.dropped += 1
+                    logger.warning("Album %s dropped: its worker disconnected", message.media_group_id)
+                return
+            answer = {"id": request["id"], "album": album}
+
+        if not writer.is_closing():
+            writer.write(json.dumps(answer).encode() + b"\n")
+            await writer.drain()
+
+
+class SocketAlbumBackend(AlbumBackend):
+    """Album backend of a worker process, forwards the parts of albums to an :class:`AlbumServer`.
+
+    Every part costs one round trip over the unix socket, so an album waits the time the server
+    needs to close it plus well under a millisecond. While the server cannot be reached or
+    answers with an error, albums are collected in a local :class:`AlbumBuffer`: they may then
+    be split between the workers, and an album that was open when the connection broke may be
+    handled twice.
+
+    Args:
+        path: Path of the server's unix socket
+        fallback: Optional local :class:`AlbumBuffer` used while the server cannot be reached or fails
+        stats_size: Number of recent albums kept for :meth:`latency_stats` (default: 1000)
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        fallback: Optional[AlbumBuffer] = None,
+        stats_size: int = 1000,
+    ):
+        super().__init__(stats_size)
+        self.path = os.fspath(path)
+        self.fallback = fallback or AlbumBuffer()
+
+        self.handled = 0
+        self.local = 0
+
+        self._ids = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connecting = asyncio.Lock()
+
+    def metrics(self) -> Dict[str, int]:
+        """Returns the number of parts waiting for the server and the counters of albums handled through it and locally."""
+
+        return {
+            "live": len(self._pending),
+            "handled": self.handled,
+            "local": self.local,
+        }
+
+    async def collect(self, message: Message) -> Optional[List[Message]]:
+        started = time.monotonic()
+        try:
+            album = await self._forward(message)
+        except Exception as e:
+            # Unreachable, or it sent an error or an unreadable answer.
+            logger.warning("AlbumServer failed, collecting album %s locally: %s", message.media_group_id, e)
+            album = await self.fallback.collect(message)
+            if album is not None:
+                self.local += 1
+            return album
+
+        if album is None:
+            return None
+
+        self.handled += 1
+        self._delays.append(time.monotonic() - started)
+
+        bot = message.bot
+        album = [Message.model_validate(part) for part in album]
+        return [part.as_(bot) for part in album] if bot is not None else album
+
+    async def close(self) -> None:
+        """Closes the connection to the server."""
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+
+    async def _forward(self, message: Message) -> Optional[List[Dict[str, Any]]]:
+        writer = await self._connect()
+
+        request_id = next(self._ids)
+        answer = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = answer
+        try:
+            writer.write(json.dumps({
+                "id": request_id,
+                "message": message.model_dump(mode="json", exclude_none=True),
+            }).encode() + b"\n")
+            await writer.drain()
+            return await answer
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        async with self._connecting:
+            if self._writer is None or self._writer.is_closing():
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+                self._reader_task = asyncio.create_task(self._read(reader, self._writer))
+            return self._writer
+
+    async def _read(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Hands the answers of the server to the waiting parts, fails them when the connection is lost."""
+
+        try:
+            while line := await reader.readline():
+                answer = json.loads(line)
+                if (future := self._pending.get(answer["id"])) is None or future.done():
+                    continue
+                if "error" in answer:
+                    future.set_exception(RuntimeError(f"AlbumServer error: {answer['error']}"))
+                else:
+                    future.set_result(answer["album"])
+            error: Exception = EOFError("AlbumServer closed the connection")
+        except Exception as e:
+            error = e
+
+        writer.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
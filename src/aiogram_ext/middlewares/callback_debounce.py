@@ -0,0 +1,81 @@
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Union
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject
+
+from aiogram_ext.notification.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackDebounceMiddleware(BaseMiddleware):
+    """Middleware that drops repeated taps on the same inline button.
+
+    A callback query with the same chat, message and data as one seen less than `window`
+    seconds ago is answered at once and never reaches the handler.
+
+    Seen queries are kept in two time buckets of `window` seconds each: the current bucket and
+    the previous one. Older buckets are dropped as a whole, and a bucket that reaches `max_size`
+    entries is rotated early, so memory stays bounded during a flood.
+
+    **NOTE**: Register it before :class:`ChatLockMiddleware`, so duplicates do not wait for the lock.
+
+    Args:
+        window: Time in seconds in which a repeated tap counts as a duplicate (default: 1.0)
+        max_size: Maximum number of queries in one bucket (default: 10000)
+    """
+
+    def __init__(self, window: Union[int, float] = 1.0, max_size: int = 10000):
+        super().__init__()
+        self.window = window
+        self.max_size = max_size
+
+        self._current: Dict[Hashable, float] = {}
+        self._previous: Dict[Hashable, float] = {}
+        self._bucket_started = time.monotonic()
+
+    def is_duplicate(self, key: Hashable, now: float) -> bool:
+        """Returns True if the key was seen within the window, otherwise remembers it."""
+
+        if now - self._bucket_started >= self.window:
+            self._rotate(now)
+
+        seen = self._current.get(key)
+        if seen is None:
+            seen = self._previous.get(key)
+
+        if seen is not None and now - seen < self.window:
+            return True
+
+        self._current[key] = now
+        if len(self._current) >= self.max_size:
+            self._rotate(now)
+        return False
+
+    def _rotate(self, now: float) -> None:
+        # The previous bucket is only useful while it can still hold queries from within the window.
+        self._previous = self._current if now - self._bucket_started < 2 * self.window else {}
+        self._current = {}
+        self._bucket_started = now
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        callback = event.callback if isinstance(event, Notification) else event
+        if not isinstance(callback, CallbackQuery) or callback.message is None:
+            return await handler(event, data)
+
+        key = (callback.message.chat.id, callback.message.message_id, callback.data)
+        if not self.is_duplicate(key, time.monotonic()):
+            return await handler(event, data)
+
+        logger.debug("Duplicate callback %r in chat %d dropped", callback.data, key[0])
+        try:
+            await callback.answer()
+        except Exception as e:
+            logger.debug("Cannot answer duplicate callback: %s", e)
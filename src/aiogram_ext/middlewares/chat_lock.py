@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from aiogram_ext.notification.notification import Notification
+
+logger = logging.getLogger(__name__)
+
+
+class ChatLockMiddleware(BaseMiddleware):
+    """Middleware that handles updates of the same chat one at a time.
+
+    Chats are mapped onto a fixed array of `shards` locks, so memory stays bounded however
+    many chats the bot has. Updates of different chats run in parallel unless their chats
+    share a shard, which only delays them and never reorders updates of one chat.
+
+    **NOTE**: Register it after :class:`MediaMiddleware`, otherwise the messages of an album
+    wait for each other and the album is never collected.
+
+    Args:
+        shards: Number of locks (default: 1024)
+    """
+
+    def __init__(self, shards: int = 1024):
+        super().__init__()
+        if shards < 1:
+            raise ValueError("shards must be positive")
+        self.shards = shards
+        self._locks = [asyncio.Lock() for _ in range(shards)]
+
+    @staticmethod
+    def chat_id(event: TelegramObject, data: Dict[str, Any]) -> Optional[int]:
+        if (chat := data.get("event_chat")) is not None:
+            return chat.id
+
+        if isinstance(event, Notification):
+            if event.chat_id is not None:
+                return event.chat_id
+            event = event.callback or event.message
+
+        if isinstance(event, Message):
+            return event.chat.id
+        if isinstance(event, CallbackQuery) and event.message is not None:
+            return event.message.chat.id
+        return None
+
+    def lock_for(self, chat_id: int) -> asyncio.Lock:
+        return self._locks[chat_id % self.shards]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        chat_id = self.chat_id(event, data)
+        if chat_id is None:
+            return await handler(event, data)
+
+        lock = self.lock_for(chat_id)
+        if lock.locked():
+            logger.debug("Update of chat %d waits for the previous one", chat_id)
+
+        async with lock:
+            return await handler(event, data)
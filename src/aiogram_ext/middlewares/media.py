@@ -1,6 +1,12 @@
 import asyncio
+import heapq
+import itertools
 import logging
-from typing import Callable, Any, Awaitable, Dict, List, Union
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Any, Awaitable, Deque, Dict, List, Optional, Tuple, Union
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message
@@ -9,13 +15,309 @@ from aiogram_ext.notification.notification import Notification
 
 logger = logging.getLogger(__name__)
 
+# Telegram albums hold at most 10 items.
+ALBUM_LIMIT = 10
 
-class MediaMiddleware(BaseMiddleware):
-    """Middleware for processing message albums in Telegram."""
 
-    def __init__(self, latency: Union[int, float] = 1):
+@dataclass
+class _Album:
+    media_group_id: str
+    chat_id: int
+    messages: List[Message]
+    done: asyncio.Future
+    seq: int
+    started: float = field(default_factory=time.monotonic)
+    last_arrival: float = field(default_factory=time.monotonic)
+    max_gap: float = 0.0
+
+
+class AlbumBackend(ABC):
+    """Collects the parts of albums for :class:`MediaMiddleware`.
+
+    Args:
+        stats_size: Number of recent albums kept for :meth:`latency_stats` (default: 1000)
+    """
+
+    def __init__(self, stats_size: int = 1000):
+        self._delays: Deque[float] = deque(maxlen=stats_size)
+
+    @abstractmethod
+    async def collect(self, message: Message) -> Optional[List[Message]]:
+        """Adds a part of an album.
+
+        Returns the complete album, sorted by message_id, to exactly one caller per album, None to the others.
+        """
+
+    def metrics(self) -> Dict[str, int]:
+        return {}
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Returns the count and p50/p90/p99/max wait in seconds of recent albums."""
+
+        delays = sorted(self._delays)
+        if not delays:
+            return {"count": 0}
+
+        def percentile(p: float) -> float:
+            return delays[min(len(delays) - 1, int(p * len(delays)))]
+
+        return {
+            "count": len(delays),
+            "p50": percentile(0.50),
+            "p90": percentile(0.90),
+            "p99": percentile(0.99),
+            "max": delays[-1],
+        }
+
+
+class AlbumBuffer(AlbumBackend):
+    """Bounded buffer of albums that are still being collected.
+
+    Albums are closed by a single sweeper task, which runs only while albums are open: an album
+    is closed as soon as no new part arrived for the quiet window or 10 parts are collected, but
+    never later than `latency` seconds after the first part. Closed albums are always removed,
+    whatever happens to their handler.
+
+    At most `max_albums` albums are open at once, a new album closes the oldest one early.
+    A chat can have at most `max_albums_per_chat` open albums, further albums of the chat are dropped.
+
+    The quiet window adapts to how far apart the parts arrive: it is twice the moving average of
+    the largest gap between parts of recent albums, at least `quiet` and at most `latency` seconds.
+    A part that arrives after its album was closed counts as a gap as well.
+
+    Args:
+        latency: Maximum time in seconds to wait for the parts of an album (default: 1)
+        quiet: Minimum time in seconds without a new part after which an album is complete (default: 0.05)
+        max_albums: Maximum number of open albums (default: 1000)
+        max_albums_per_chat: Maximum number of open albums per chat (default: 5)
+        stats_size: Number of recent albums kept for :meth:`latency_stats` (default: 1000)
+    """
+
+    def __init__(
+        self,
+        latency: Union[int, float] = 1,
+        quiet: Union[int, float] = 0.05,
+        max_albums: int = 1000,
+        max_albums_per_chat: int = 5,
+        stats_size: int = 1000,
+    ):
+        super().__init__(stats_size)
         self.latency = latency
-        self.album_data: Dict[str, List[Message]] = {}
+        self.quiet = quiet
+        self.max_albums = max_albums
+        self.max_albums_per_chat = max_albums_per_chat
+        self.quiet_window = quiet
+
+        self.evicted = 0
+        self.rejected = 0
+        self.merged = 0
+        self.dropped = 0
+
+        self._albums: Dict[str, _Album] = {}  # insertion-ordered, oldest first
+        self._per_chat: Dict[int, int] = {}
+        self._gap = 0.0
+        # media_group_id -> arrival of the last part, for recently closed albums.
+        self._closed: "OrderedDict[str, float]" = OrderedDict()
+
+        # (deadline, seq, media_group_id), entries of closed albums are skipped when they come up.
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._next_wakeup = float("inf")
+        self._wakeup = asyncio.Event()
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._albums)
+
+    def metrics(self) -> Dict[str, int]:
+        """Returns the number of open albums and the counters of evicted and rejected albums, merged and dropped parts."""
+
+        return {
+            "live": len(self._albums),
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+            "merged": self.merged,
+            "dropped": self.dropped,
+        }
+
+    async def collect(self, message: Message) -> Optional[List[Message]]:
+        done = self.add(message)
+        if done is None:
+            return None
+        return await asyncio.shield(done)
+
+    def add(self, message: Message) -> Optional[asyncio.Future]:
+        """Adds a part of an album.
+
+        Returns a future with the parts of the album for the first part, None for later parts
+        and for parts that were dropped.
+        """
+
+        now = time.monotonic()
+
+        if (album := self._albums.get(message.media_group_id)) is not None:
+            if len(album.messages) >= ALBUM_LIMIT:
+                self.dropped += 1
+                return None
+
+            album.messages.append(message)
+            album.max_gap = max(album.max_gap, now - album.last_arrival)
+            album.last_arrival = now
+            self.merged += 1
+
+            if len(album.messages) >= ALBUM_LIMIT:
+                self._close(album, now)
+            return None
+
+        chat_id = message.chat.id
+        if self._per_chat.get(chat_id, 0) >= self.max_albums_per_chat:
+            self.rejected += 1
+            logger.warning("Album %s of chat %d dropped: too many open albums", message.media_group_id, chat_id)
+            return None
+
+        if (last_arrival := self._closed.pop(message.media_group_id, None)) is not None:
+            gap = now - last_arrival
+            self._observe_gap(max(self._gap, gap))
+            logger.warning(
+                "Album %s got a part %.3fs after it was closed, quiet window is now %.3fs",
+                message.media_group_id, gap, self.quiet_window
+            )
+
+        while len(self._albums) >= self.max_albums:
+            self.evicted += 1
+            self._close(next(iter(self._albums.values())), now)
+
+        album = _Album(
+            media_group_id=message.media_group_id,
+            chat_id=chat_id,
+            messages=[message],
+            done=asyncio.get_running_loop().create_future(),
+            seq=next(self._seq),
+        )
+        self._albums[album.media_group_id] = album
+        self._per_chat[chat_id] = self._per_chat.get(chat_id, 0) + 1
+        logger.info("New album detected: %s", message.media_group_id)
+
+        deadline = self._deadline(album)
+        if len(self._schedule) > 2 * self.max_albums:
+            self._schedule = [(self._deadline(a), a.seq, a.media_group_id) for a in self._albums.values()]
+            heapq.heapify(self._schedule)
+        else:
+            heapq.heappush(self._schedule, (deadline, album.seq, album.media_group_id))
+
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep())
+        elif deadline < self._next_wakeup:
+            self._wakeup.set()
+
+        return album.done
+
+    def _deadline(self, album: _Album) -> float:
+        return min(album.last_arrival + self.quiet_window, album.started + self.latency)
+
+    def _observe_gap(self, gap: float) -> None:
+        self._gap = gap
+        self.quiet_window = min(self.latency, max(self.quiet, 2 * gap))
+
+    def _close(self, album: _Album, now: float) -> None:
+        if self._albums.pop(album.media_group_id, None) is None:
+            return
+
+        if (count := self._per_chat[album.chat_id] - 1) > 0:
+            self._per_chat[album.chat_id] = count
+        else:
+            del self._per_chat[album.chat_id]
+
+        delay = now - album.started
+        self._delays.append(delay)
+        if len(album.messages) > 1:
+            self._observe_gap(0.8 * self._gap + 0.2 * album.max_gap)
+
+        self._closed[album.media_group_id] = album.last_arrival
+        while len(self._closed) > 256:
+            self._closed.popitem(last=False)
+
+        logger.debug("Album %s closed with %d parts after %.3fs", album.media_group_id, len(album.messages), delay)
+        if not album.done.done():
+            album.done.set_result(sorted(album.messages, key=lambda msg: msg.message_id))
+
+    async def _sweep(self) -> None:
+        """Closes complete albums in deadline order, exits when no album is open."""
+
+        try:
+            while self._albums:
+                now = time.monotonic()
+                while self._schedule:
+                    deadline, seq, media_group_id = self._schedule[0]
+                    album = self._albums.get(media_group_id)
+                    if album is None or album.seq != seq:
+                        heapq.heappop(self._schedule)
+                        continue
+
+                    # Parts only move deadlines later, the entry is pushed back if that happened.
+                    actual = self._deadline(album)
+                    if actual <= now:
+                        heapq.heappop(self._schedule)
+                        self._close(album, now)
+                    elif actual > deadline:
+                        heapq.heapreplace(self._schedule, (actual, seq, media_group_id))
+                    else:
+                        break
+
+                if not self._albums:
+                    break
+
+                self._next_wakeup = self._schedule[0][0]
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), max(self._next_wakeup - now, 0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._next_wakeup = float("inf")
+            self._schedule.clear()
+
+
+class MediaMiddleware(BaseMiddleware):
+    """Middleware for processing message albums in Telegram.
+
+    The first message of an album waits for the rest, the handler is called once with all of
+    them in `data["album"]`. By default albums are collected in process memory by an
+    :class:`AlbumBuffer`, see it for when an album is complete and how the buffer is bounded.
+    Bots that run several worker processes pass a shared `backend` instead, such as
+    :class:`aiogram_ext.middlewares.album_server.SocketAlbumBackend`.
+
+    Args:
+        latency: Maximum time in seconds to wait for the parts of an album (default: 1)
+        quiet: Minimum time in seconds without a new part after which an album is complete (default: 0.05)
+        max_albums: Maximum number of open albums (default: 1000)
+        max_albums_per_chat: Maximum number of open albums per chat (default: 5)
+        stats_size: Number of recent albums kept for :meth:`latency_stats` (default: 1000)
+        backend: Optional album backend, the other arguments are then ignored
+    """
+
+    def __init__(
+        self,
+        latency: Union[int, float] = 1,
+        quiet: Union[int, float] = 0.05,
+        max_albums: int = 1000,
+        max_albums_per_chat: int = 5,
+        stats_size: int = 1000,
+        backend: Optional[AlbumBackend] = None,
+    ):
+        self.backend = backend or AlbumBuffer(
+            latency=latency,
+            quiet=quiet,
+            max_albums=max_albums,
+            max_albums_per_chat=max_albums_per_chat,
+            stats_size=stats_size,
+        )
+
+    def metrics(self) -> Dict[str, int]:
+        return self.backend.metrics()
+
+    def latency_stats(self) -> Dict[str, float]:
+        return self.backend.latency_stats()
 
     async def __call__(
         self,
@@ -34,23 +336,17 @@ class MediaMiddleware(BaseMiddleware):
             return await handler(event, data)
 
         try:
-            self.album_data.setdefault(message.media_group_id, []).append(message)
-
+            album = await self.backend.collect(message)
         except Exception as e:
-            logger.error("Error adding message to album: %s", e, exc_info=True)
+            # The part is still handled on its own rather than lost.
+            logger.error("Error collecting album: %s", e, exc_info=True)
             return await handler(event, data)
 
-        if len(self.album_data[message.media_group_id]) == 1:
-            logger.info("New album detected: %s. Waiting %.1f seconds...", message.media_group_id, self.latency)
-            await asyncio.sleep(self.latency)
+        if album is None:
+            return
 
-            album_messages = self.album_data.pop(message.media_group_id, [])
-            if album_messages:
-                try:
-                    data["album"] = album_messages
-                    return await handler(event, data)
-                except Exception as e:
-                    logger.error("Error processing album: %s", e, exc_info=True)
-                    # We clear in case of an error.
-                    if message.media_group_id in self.album_data:
-                        del self.album_data[message.media_group_id]
+        try:
+            data["album"] = album
+            return await handler(event, data)
+        except Exception as e:
+            logger.error("Error processing album: %s", e, exc_info=True)
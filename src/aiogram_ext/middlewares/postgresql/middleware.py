@@ -6,6 +6,8 @@ from aiogram.types import TelegramObject
 
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
+from aiogram_ext.storage.lazy_session import LazySession
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,6 +17,9 @@ class PostgresqlSessionMiddleware(BaseMiddleware):
     **NOTE**: If you need to execute multiple database queries in one handler, they will be executed within a single transaction.
     
     **NOTE**: There is no need to explicitly write `commit`, `rollback` and `close`, the context manager does this.
+
+    **NOTE**: The session is lazy (:class:`LazySession`): updates whose handler never queries the database
+    do not check out a connection or open a transaction at all.
     """
 
     def __init__(self, session_pool: async_sessionmaker[AsyncSession]):
@@ -27,24 +32,17 @@ class PostgresqlSessionMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        async with self.session_pool() as session:
+        async with LazySession(self.session_pool) as session:
             data["postgresql_session"] = session
-            logger.debug("Postgresql session created for handler")
 
             try:
-                async with session.begin():
-                    logger.debug("Transaction started")
-                    result = await handler(event, data)
-                    logger.debug("Transaction completed successfully")
-                    return result
+                return await handler(event, data)
 
             except Exception as e:
-                logger.error(
-                    "Transaction rolled back due to error: %s",
-                    e,
-                    exc_info=True
-                )
+                if session.started:
+                    logger.error(
+                        "Transaction rolled back due to error: %s",
+                        e,
+                        exc_info=True
+                    )
                 raise
-
-            finally:
-                logger.debug("Postgresql session closed")
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from aiogram_ext.bot.scheduler import Lane, outbound_lane
+from aiogram_ext.enums.notification_type import NotificationType
+from aiogram_ext.notification.notification import Notification
+from aiogram_ext.storage.sqlite_storage.models import TableBlockedChat, TableBroadcast
+from aiogram_ext.storage.sqlite_storage.outbox import TrackingOutbox, TrackingWrite
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_TYPES = (
+    NotificationType.AUTO_DELAY,
+    NotificationType.INFO,
+    NotificationType.MEDIA,
+    NotificationType.MEDIA_APART,
+    NotificationType.MEDIA_GROUP,
+)
+
+
+@dataclass
+class BroadcastStats:
+    """Throughput and error statistics of a broadcast run.
+
+    The counters cover the whole broadcast including earlier runs, `errors` maps
+    exception names to the number of failed deliveries in this run only.
+    """
+
+    broadcast_id: str
+    total: int
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    skipped: int = 0
+    resumed_from: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked + self.skipped
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self) -> float:
+        """Notifications processed per second in this run."""
+
+        done_in_run = self.processed - self.resumed_from
+        return done_in_run / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class _BufferedOutbox(TrackingOutbox):
+    """Outbox that keeps the tracking writes until the next checkpoint."""
+
+    def __init__(self, sqlite_session_pool: async_sessionmaker[AsyncSession]):
+        super().__init__(sqlite_session_pool)
+        self.buffer: List[TrackingWrite] = []
+
+    async def commit(self, writes: List[TrackingWrite]) -> None:
+        self.buffer.extend(writes)
+
+
+class Broadcast:
+    """Resumable fan-out of a notification to many chats.
+
+    Targets are processed by `concurrency` workers in the bulk lane of the
+    :class:`OutboundScheduler`, if one is installed. Progress, tracked message IDs and
+    chats that blocked the bot are written together at every checkpoint, a crashed
+    broadcast started again with the same ID and targets resumes from the last checkpoint.
+
+    Chats that blocked the bot are skipped for `blocked_ttl` seconds after the last failed
+    delivery and tried again afterwards, a successful delivery removes them from the list.
+    Call :meth:`unblock` when a chat is known to be reachable again, e.g. from a `/start` handler.
+
+    **NOTE**: Delivery is at-least-once: targets processed after the last checkpoint are sent again on resume.
+
+    Args:
+        notification: Notification whose bot and services are used for every target
+        sqlite_session_pool: Session maker for checkpoints
+        concurrency: Number of concurrent deliveries (default: 25)
+        checkpoint_every: Checkpoint after this many processed targets (default: 100)
+        checkpoint_interval: Checkpoint at least this often, in seconds (default: 5.0)
+        blocked_ttl: Time in seconds a blocked chat is skipped, None skips it until unblocked (default: 7 days)
+    """
+
+    def __init__(
+        self,
+        notification: Notification,
+        sqlite_session_pool: async_sessionmaker[AsyncSession],
+        concurrency: int = 25,
+        checkpoint_every: int = 100,
+        checkpoint_interval: float = 5.0,
+        blocked_ttl: Optional[float] = 7 * 24 * 3600,
+    ):
+        self.notification = notification
+        self.sqlite_session_pool = sqlite_session_pool
+        self.concurrency = concurrency
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.blocked_ttl = blocked_ttl
+
+        self.stats: Optional[BroadcastStats] = None
+        self._outbox = _BufferedOutbox(sqlite_session_pool)
+        self._blocked: Dict[int, str] = {}
+        self._unblocked: Set[int] = set()
+        self._checkpoint_lock = asyncio.Lock()
+
+    async def run(
+        self,
+        broadcast_id: str,
+        chat_ids: Sequence[int],
+        notification_type: NotificationType,
+        **send_kwargs: Any,
+    ) -> BroadcastStats:
+        """Sends the notification to every chat and returns the run statistics."""
+
+        if notification_type not in BROADCAST_TYPES:
+            raise ValueError(f"Notification type {notification_type} cannot be broadcast")
+
+        async with self.sqlite_session_pool() as sqlite_session:
+            record = await TableBroadcast.get_by_name(broadcast_id, sqlite_session)
+            all_blocked = await TableBlockedChat.get_blocked_chat_ids(sqlite_session)
+            if self.blocked_ttl is None:
+                known_blocked = all_blocked
+            else:
+                known_blocked = await TableBlockedChat.get_blocked_chat_ids(sqlite_session, time.time() - self.blocked_ttl)
+            # Blocks that expired are tried again, a chat that accepts the message is unblocked.
+            expired_blocked = all_blocked - known_blocked
+
+        stats = self.stats = BroadcastStats(broadcast_id=broadcast_id, total=len(chat_ids))
+        if record is not None:
+            stats.sent, stats.failed, stats.blocked = record.sent, record.failed, record.blocked
+            stats.skipped = record.cursor - record.sent - record.failed - record.blocked
+            stats.resumed_from = record.cursor
+
+            if record.finished:
+                stats.finished = stats.started
+                return stats
+
+            logger.info("Resuming broadcast '%s' at %d/%d", broadcast_id, record.cursor, len(chat_ids))
+
+        cursor = stats.resumed_from
+        next_index = cursor
+        outcomes: Dict[int, str] = {}
+        since_checkpoint = 0
+        last_checkpoint = time.monotonic()
+
+        async def worker() -> None:
+            nonlocal next_index, cursor, since_checkpoint, last_checkpoint
+
+            while next_index < len(chat_ids):
+                index = next_index
+                next_index += 1
+
+                chat_id = chat_ids[index]
+                if chat_id in known_blocked:
+                    outcomes[index] = "skipped"
+                else:
+                    outcome = outcomes[index] = await self._deliver(chat_id, notification_type, send_kwargs)
+                    if outcome == "sent" and chat_id in expired_blocked:
+                        self._unblocked.add(chat_id)
+
+                # The cursor only moves past a contiguous run of finished targets and the counters
+                # follow it, so a checkpoint describes exactly the targets before the cursor.
+                while cursor in outcomes:
+                    outcome = outcomes.pop(cursor)
+                    setattr(stats, outcome, getattr(stats, outcome) + 1)
+                    cursor += 1
+
+                since_checkpoint += 1
+                due = since_checkpoint >= self.checkpoint_every or time.monotonic() - last_checkpoint >= self.checkpoint_interval
+                # Workers never queue behind a running checkpoint, the next one picks up their progress.
+                if due and not self._checkpoint_lock.locked():
+                    since_checkpoint = 0
+                    last_checkpoint = time.monotonic()
+                    await self._checkpoint(cursor)
+
+        with outbound_lane(Lane.BULK):
+            await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+
+        stats.finished = time.monotonic()
+        await self._checkpoint(cursor, finished=True)
+
+        logger.info(
+            "Broadcast '%s' finished: %d sent, %d failed, %d blocked, %d skipped in %.1fs (%.1f/s)",
+            broadcast_id, stats.sent, stats.failed, stats.blocked, stats.skipped, stats.elapsed, stats.rate
+        )
+        return stats
+
+    async def unblock(self, *chat_ids: int) -> int:
+        """Removes the chats from the blocked list, returns the number of chats that were blocked."""
+
+        for chat_id in chat_ids:
+            self._blocked.pop(chat_id, None)
+            self._unblocked.discard(chat_id)
+
+        async with self.sqlite_session_pool() as sqlite_session:
+            async with sqlite_session.begin():
+                return await TableBlockedChat.unblock_chats(chat_ids, sqlite_session)
+
+    async def _deliver(self, chat_id: int, notification_type: NotificationType, send_kwargs: Dict[str, Any]) -> str:
+        """Sends the notification to one chat, returns the name of the outcome counter."""
+
+        notification = Notification(
+            bot=self.notification.bot,
+            dispatcher=self.notification.dispatcher,
+            sqlite_session=self.notification.sqlite_session,
+            chat_id=chat_id,
+            ledger=self.notification.ledger,
+            outbox=self._outbox,
+            timers=self.notification.timers,
+            deleter=self.notification.deleter,
+            payload_store=self.notification.payload_store,
+            file_cache=self.notification.file_cache,
+        )
+
+        for _ in range(3):
+            try:
+                await notification.send(notification_type, **send_kwargs)
+                return "sent"
+
+            except TelegramRetryAfter as e:
+                error = e
+                await asyncio.sleep(e.retry_after)
+
+            except TelegramForbiddenError as e:
+                self._blocked[chat_id] = e.message
+                return "blocked"
+
+            except TelegramBadRequest as e:
+                if "chat not found" in e.message.lower():
+                    self._blocked[chat_id] = e.message
+                    return "blocked"
+                error = e
+                break
+
+            except Exception as e:
+                error = e
+                break
+
+        name = type(error).__name__
+        self.stats.errors[name] = self.stats.errors.get(name, 0) + 1
+        logger.debug("Broadcast '%s' delivery to chat %d failed: %s", self.stats.broadcast_id, chat_id, error)
+        return "failed"
+
+    async def _checkpoint(self, cursor: int, finished: bool = False) -> None:
+        """Writes progress, buffered tracking writes and new blocked chats in one transaction."""
+
+        async with self._checkpoint_lock:
+            stats = self.stats
+            writes, self._outbox.buffer = self._outbox.buffer, []
+            blocked, self._blocked = self._blocked, {}
+            unblocked, self._unblocked = self._unblocked, set()
+            progress = {
+                "total": stats.total,
+                "cursor": cursor,
+                "sent": stats.sent,
+                "failed": stats.failed,
+                "blocked": stats.blocked,
+                "finished": finished,
+            }
+
+            try:
+                async with self.sqlite_session_pool() as sqlite_session:
+                    async with sqlite_session.begin():
+                        await TrackingOutbox._apply(writes, sqlite_session)
+                        await TableBlockedChat.save_blocked_chats(blocked, sqlite_session)
+                        await TableBlockedChat.unblock_chats(unblocked, sqlite_session)
+                        await TableBroadcast.save_progress(stats.broadcast_id, progress, sqlite_session)
+
+            except Exception as e:
+                self._outbox.buffer[:0] = writes
+                self._blocked = {**blocked, **self._blocked}
+                self._unblocked |= unblocked
+                logger.error("Broadcast '%s' checkpoint failed: %s", stats.broadcast_id, e, exc_info=True)
@@ -7,7 +7,7 @@ from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto, InputMediaVideo
 @dataclass
 class NotificationContext:
     msg: Optional[str] = None
-    media: Optional[Union[InputMediaPhoto, InputMediaVideo, Dict[str, Any]]] = None
+    media: Optional[Union[InputMediaPhoto, InputMediaVideo, Dict[str, Any], List[Any]]] = None
     media_caption: Optional[str] = None
     kbd: Optional[InlineKeyboardMarkup] = None
     button_text: Optional[List[List[str]]] = None
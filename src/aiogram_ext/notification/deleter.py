@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+# Telegram accepts at most 100 message IDs per deleteMessages call.
+DELETE_MESSAGES_LIMIT = 100
+
+
+@dataclass
+class _PendingDeletion:
+    msg_ids: Dict[int, None] = field(default_factory=dict)  # insertion-ordered set
+    waiters: List[Tuple[List[int], asyncio.Future]] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+
+
+class MessageDeleter:
+    """Coalesces message deletions into chunked `delete_messages` calls.
+
+    Deletions requested for the same chat within `window` seconds are merged and sent as
+    `delete_messages` calls of up to 100 IDs. If a chunk is rejected, its IDs are retried
+    one by one so that every caller learns exactly which of its IDs could not be deleted.
+
+    Use :meth:`for_bot` to share one deleter per bot across all notifications.
+
+    Args:
+        bot: Telegram bot instance
+        window: Time in seconds to wait for more deletions in the same chat (default: 0.02)
+    """
+
+    # The shared deleter lives on the bot instance itself: a weak mapping keyed by the bot would
+    # match other Bot objects with the same token, and the deleter's own reference to the bot
+    # would keep the key alive forever.
+    _attribute = "_aiogram_ext_message_deleter"
+
+    def __init__(self, bot: Bot, window: float = 0.02):
+        self.bot = bot
+        self.window = window
+        self._pending: Dict[int, _PendingDeletion] = {}
+
+    @classmethod
+    def for_bot(cls, bot: Bot) -> "MessageDeleter":
+        """Returns the shared deleter of the bot, creating it on first call."""
+
+        # Looked up in the instance dict, so a bot proxy with __getattr__ cannot answer for it.
+        if (deleter := vars(bot).get(cls._attribute)) is None:
+            deleter = cls(bot)
+            setattr(bot, cls._attribute, deleter)
+        return deleter
+
+    async def delete(self, chat_id: int, msg_ids: Iterable[int]) -> List[int]:
+        """Deletes the messages, returns the IDs that could not be deleted."""
+
+        msg_ids = [msg_id for msg_id in msg_ids if msg_id is not None]
+        if not msg_ids:
+            return []
+
+        pending = self._pending.get(chat_id)
+        if pending is None:
+            pending = self._pending[chat_id] = _PendingDeletion()
+            pending.task = asyncio.create_task(self._flush_later(chat_id, pending))
+
+        future = asyncio.get_running_loop().create_future()
+        pending.waiters.append((msg_ids, future))
+        pending.msg_ids.update(dict.fromkeys(msg_ids))
+
+        if len(pending.msg_ids) >= DELETE_MESSAGES_LIMIT:
+            pending.task.cancel()
+            pending.task = asyncio.create_task(self._flush(chat_id, pending))
+
+        return await future
+
+    async def _flush_later(self, chat_id: int, pending: _PendingDeletion) -> None:
+        await asyncio.sleep(self.window)
+        await self._flush(chat_id, pending)
+
+    async def _flush(self, chat_id: int, pending: _PendingDeletion) -> None:
+        if self._pending.get(chat_id) is pending:
+            del self._pending[chat_id]
+
+        try:
+            failed = await self._delete_now(chat_id, list(pending.msg_ids))
+        except Exception as e:
+            for _, future in pending.waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if failed:
+            logger.debug("Could not delete messages %s in chat %d", sorted(failed), chat_id)
+
+        for msg_ids, future in pending.waiters:
+            if not future.done():
+                future.set_result([msg_id for msg_id in msg_ids if msg_id in failed])
+
+    async def _delete_now(self, chat_id: int, msg_ids: List[int]) -> Set[int]:
+        failed: Set[int] = set()
+
+        for start in range(0, len(msg_ids), DELETE_MESSAGES_LIMIT):
+            chunk = msg_ids[start:start + DELETE_MESSAGES_LIMIT]
+
+            if len(chunk) > 1:
+                try:
+                    await self.bot.delete_messages(chat_id=chat_id, message_ids=chunk)
+                    continue
+                except Exception as e:
+                    logger.debug("delete_messages rejected %d IDs in chat %d, retrying one by one: %s", len(chunk), chat_id, e)
+
+            results = await asyncio.gather(
+                *(self.bot.delete_message(chat_id=chat_id, message_id=msg_id) for msg_id in chunk),
+                return_exceptions=True
+            )
+            failed.update(msg_id for msg_id, result in zip(chunk, results) if isinstance(result, Exception))
+
+        return failed
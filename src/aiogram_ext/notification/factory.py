@@ -5,9 +5,14 @@ from aiogram_ext.notification.strategies.close_menu_strategy import CloseMenuStr
 from aiogram_ext.notification.strategies.info_strategy import InfoStrategy
 from aiogram_ext.notification.strategies.auto_delay_strategy import AutoDelayStrategy
 from aiogram_ext.notification.strategies.dialog_strategy import DialogStrategy
+from aiogram_ext.notification.strategies.dialog_media_strategy import DialogMediaStrategy
+from aiogram_ext.notification.strategies.dialog_media_apart_strategy import DialogMediaApartStrategy
+from aiogram_ext.notification.strategies.dialog_media_group_strategy import DialogMediaGroupStrategy
 from aiogram_ext.notification.strategies.invalid_input_strategy import InvalidInputStrategy
 from aiogram_ext.notification.strategies.invalid_media_group_strategy import InvalidMediaGroupStrategy
 from aiogram_ext.notification.strategies.media_strategy import MediaStrategy
+from aiogram_ext.notification.strategies.media_apart_strategy import MediaApartStrategy
+from aiogram_ext.notification.strategies.media_group_strategy import MediaGroupStrategy
 from aiogram_ext.notification.strategies.start_menu_strategy import StartMenuStrategy
 
 
@@ -22,7 +27,12 @@ def get_strategy(notification_type: NotificationType, notification):
         NotificationType.CLOSE_MENU: CloseMenuStrategy,
         NotificationType.CLOSE_NOTIFICATION: CloseNotification,
         NotificationType.DIALOG: DialogStrategy,
+        NotificationType.DIALOG_MEDIA: DialogMediaStrategy,
+        NotificationType.DIALOG_MEDIA_APART: DialogMediaApartStrategy,
+        NotificationType.DIALOG_MEDIA_GROUP: DialogMediaGroupStrategy,
         NotificationType.MEDIA: MediaStrategy,
+        NotificationType.MEDIA_APART: MediaApartStrategy,
+        NotificationType.MEDIA_GROUP: MediaGroupStrategy,
     }
 
     if strategy_class := strategy_map.get(notification_type):
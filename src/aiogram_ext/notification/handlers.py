@@ -1,11 +1,14 @@
 import logging
+from typing import Dict, List
 
-from aiogram import F, Dispatcher
+from aiogram import Dispatcher
 from aiogram.fsm.context import FSMContext
 
 from aiogram_ext.enums.notification_type import NotificationType
 from aiogram_ext.notification.notification import Notification
+from aiogram_ext.routing.callback_router import CallbackRouter
 from aiogram_ext.storage.sqlite_storage.models import TableNotificationMessage
+from aiogram_ext.storage.sqlite_storage.outbox import TrackingAction, TrackingWrite
 
 logger = logging.getLogger(__name__)
 
@@ -13,18 +16,16 @@ logger = logging.getLogger(__name__)
 def register_notification_handlers(dispatcher: Dispatcher) -> None:
     """Register global handlers for notifications."""
 
-    dispatcher.callback_query.register(
-        _delete_notification_handler,
-        F.data.startswith("delete_notification")
-    )
+    router = CallbackRouter(name="notification_callbacks")
+
+    router.register_callback(_delete_notification_handler, prefix="delete_notification")
     logger.debug('Registered `delete_notification` handler for dispatcher %s', dispatcher)
 
-    dispatcher.callback_query.register(
-        _clear_state,
-        F.data == "clear_fsm_state"
-    )
+    router.register_callback(_clear_state, exact="clear_fsm_state")
     logger.debug('Registered `clear_fsm_state` handler for dispatcher %s', dispatcher)
 
+    dispatcher.include_router(router)
+
 
 async def _clear_state(notification: Notification, state: FSMContext):
     """Clear FSMContext"""
@@ -38,13 +39,27 @@ async def _delete_notification_handler(notification: Notification):
     """Delete the notification."""
 
     key = notification.callback.data.split("_")[-1]
-    record = await TableNotificationMessage.get_notification_by_key(key, notification.sqlite_session)
-
-    try:
-        await notification.bot.delete_message(chat_id=record.chat_id, message_id=record.msg_id)
-    except Exception:
-        pass
 
-    await TableNotificationMessage.close_last_notification_by_key(key, notification.sqlite_session)
+    if notification.ledger is not None:
+        records = notification.ledger.get_notifications_by_key(key)
+    elif notification.outbox is not None:
+        records = await notification.outbox.get_notifications_by_key(key)
+    else:
+        records = await TableNotificationMessage.get_notifications_by_key(key, notification.sqlite_session)
+
+    # An album notification is several messages under one key.
+    by_chat: Dict[int, List[int]] = {}
+    for record in records:
+        by_chat.setdefault(record.chat_id, []).append(record.msg_id)
+
+    for chat_id, msg_ids in by_chat.items():
+        await notification.deleter.delete(chat_id, msg_ids)
+
+    if notification.ledger is not None:
+        notification.ledger.close_last_notification_by_key(key)
+    elif notification.outbox is not None:
+        await notification.outbox.commit([TrackingWrite(TrackingAction.CLOSE_NOTIFICATION_BY_KEY, key=key)])
+    else:
+        await TableNotificationMessage.close_last_notification_by_key(key, notification.sqlite_session)
 
     await notification.callback.answer("Notification removed")
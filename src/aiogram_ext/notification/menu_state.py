@@ -0,0 +1,74 @@
+import hashlib
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto
+
+# (content hash, keyboard hash) of a rendered menu message.
+MenuFingerprint = Tuple[Optional[bytes], bytes]
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.blake2b(value.encode(), digest_size=8).digest()
+
+
+class MenuRenderState:
+    """Remembers what every menu message currently shows, so unchanged menus are not edited again.
+
+    Each menu message maps to a compact fingerprint of its content and keyboard. Entries are
+    kept in an LRU of at most `max_size` messages; an unknown message is simply edited in full.
+
+    Use :meth:`for_bot` to share one state per bot across all notifications.
+
+    Args:
+        max_size: Maximum number of menu messages remembered (default: 100000)
+    """
+
+    # Kept on the bot instance, like the shared MessageDeleter (see MessageDeleter.for_bot).
+    _attribute = "_aiogram_ext_menu_render_state"
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+        self._states: "OrderedDict[Tuple[int, int], MenuFingerprint]" = OrderedDict()
+
+    @classmethod
+    def for_bot(cls, bot: Bot) -> "MenuRenderState":
+        """Returns the shared state of the bot, creating it on first call."""
+
+        if (state := vars(bot).get(cls._attribute)) is None:
+            state = cls()
+            setattr(bot, cls._attribute, state)
+        return state
+
+    @staticmethod
+    def fingerprint(
+        content: Union[str, InputMediaPhoto, None],
+        keyboard: Optional[InlineKeyboardMarkup]
+    ) -> MenuFingerprint:
+        """Hashes the menu content and keyboard. Content that is uploaded from a file has no hash."""
+
+        if isinstance(content, InputMediaPhoto):
+            content_hash = None
+            if isinstance(content.media, str):
+                content_hash = _digest(f"photo\0{content.media}\0{content.caption or ''}")
+        else:
+            content_hash = _digest(f"text\0{content or ''}")
+
+        keyboard_hash = _digest(keyboard.model_dump_json(exclude_none=True) if keyboard is not None else "")
+        return content_hash, keyboard_hash
+
+    def get(self, chat_id: int, msg_id: int) -> Optional[MenuFingerprint]:
+        if (state := self._states.get((chat_id, msg_id))) is not None:
+            self._states.move_to_end((chat_id, msg_id))
+        return state
+
+    def set(self, chat_id: int, msg_id: int, state: MenuFingerprint) -> None:
+        self._states[(chat_id, msg_id)] = state
+        self._states.move_to_end((chat_id, msg_id))
+        while len(self._states) > self.max_size:
+            self._states.popitem(last=False)
+
+    def forget(self, chat_id: int, msg_ids: Iterable[int]) -> None:
+        for msg_id in msg_ids:
+            self._states.pop((chat_id, msg_id), None)
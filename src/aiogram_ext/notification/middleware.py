@@ -1,19 +1,48 @@
 import logging
-from typing import Any, Awaitable, Callable, Dict, Union
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery
 
+from aiogram_ext.keyboard.payload_store import CallbackPayloadStore
+from aiogram_ext.media.file_cache import FileIdCache
+from aiogram_ext.notification.deleter import MessageDeleter
 from aiogram_ext.notification.notification import Notification
+from aiogram_ext.storage.sqlite_storage.ledger import MessageLedger
+from aiogram_ext.storage.sqlite_storage.outbox import TrackingOutbox
+from aiogram_ext.timer.service import TimerService
 
 logger = logging.getLogger(__name__)
 
 
 class NotificationMiddleware(BaseMiddleware):
-    """Middleware for Notification implementation."""
+    """Middleware for Notification implementation.
 
-    def __init__(self):
+    Args:
+        ledger: Optional in-memory message ledger, strategies use it instead of SQLite queries
+        outbox: Optional tracking outbox, strategies commit their tracking writes after the API calls
+        timers: Optional timer service, `auto_delay` then schedules the deletion instead of waiting for it
+        deleter: Optional message deleter, defaults to the shared deleter of the bot
+        payload_store: Optional callback payload store, keyboards then carry short tokens instead of payloads
+        file_cache: Optional file_id cache, local files and bytes are then uploaded only once
+    """
+
+    def __init__(
+        self,
+        ledger: Optional[MessageLedger] = None,
+        outbox: Optional[TrackingOutbox] = None,
+        timers: Optional[TimerService] = None,
+        deleter: Optional[MessageDeleter] = None,
+        payload_store: Optional[CallbackPayloadStore] = None,
+        file_cache: Optional[FileIdCache] = None,
+    ):
         super().__init__()
+        self.ledger = ledger
+        self.outbox = outbox
+        self.timers = timers
+        self.deleter = deleter
+        self.payload_store = payload_store
+        self.file_cache = file_cache
 
     async def __call__(
         self,
@@ -36,7 +65,13 @@ class NotificationMiddleware(BaseMiddleware):
                 dispatcher=dispatcher,
                 message=event.message,
                 callback=event,
-                sqlite_session=sqlite_session
+                sqlite_session=sqlite_session,
+                ledger=self.ledger,
+                outbox=self.outbox,
+                timers=self.timers,
+                deleter=self.deleter,
+                payload_store=self.payload_store,
+                file_cache=self.file_cache
             )
             return await handler(notification, data)
 
@@ -45,7 +80,13 @@ class NotificationMiddleware(BaseMiddleware):
                 bot=bot,
                 dispatcher=dispatcher,
                 message=event,
-                sqlite_session=sqlite_session
+                sqlite_session=sqlite_session,
+                ledger=self.ledger,
+                outbox=self.outbox,
+                timers=self.timers,
+                deleter=self.deleter,
+                payload_store=self.payload_store,
+                file_cache=self.file_cache
             )
             return await handler(notification, data)
 
@@ -1,12 +1,25 @@
-from typing import Dict, List, Optional
+import logging
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
 
 from aiogram import Bot, Dispatcher
-from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, InputMediaPhoto, InputMediaVideo, Message
 
 from aiogram_ext.enums.notification_type import NotificationType
 from aiogram_ext.notification.context import NotificationContext
+from aiogram_ext.keyboard.payload_store import CallbackPayloadStore
+from aiogram_ext.media.media import MediaContent
+from aiogram_ext.media.file_cache import FileIdCache
+from aiogram_ext.notification.deleter import MessageDeleter
+from aiogram_ext.storage.sqlite_storage.ledger import MessageLedger
+from aiogram_ext.storage.sqlite_storage.outbox import TrackingOutbox
+from aiogram_ext.timer.service import TimerService
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+if TYPE_CHECKING:
+    from aiogram_ext.notification.broadcast import BroadcastStats
+
+logger = logging.getLogger(__name__)
 
 
 class Notification:
@@ -20,15 +33,29 @@ class Notification:
         sqlite_session: AsyncSession,
         message: Optional[Message] = None,
         callback: Optional[CallbackQuery] = None,
+        chat_id: Optional[int] = None,
+        ledger: Optional[MessageLedger] = None,
+        outbox: Optional[TrackingOutbox] = None,
+        timers: Optional[TimerService] = None,
+        deleter: Optional[MessageDeleter] = None,
+        payload_store: Optional[CallbackPayloadStore] = None,
+        file_cache: Optional[FileIdCache] = None,
     ):
         self.bot = bot
         self.dispatcher = dispatcher
         self.sqlite_session = sqlite_session
         self.message = message
         self.callback = callback
+        self.chat_id = chat_id
+        self.ledger = ledger
+        self.outbox = outbox
+        self.timers = timers
+        self.deleter = deleter or MessageDeleter.for_bot(bot)
+        self.payload_store = payload_store
+        self.file_cache = file_cache
 
-        if message is None and callback is None:
-            raise RuntimeError("Either 'message' or 'callback' must be provided in data")
+        if message is None and callback is None and chat_id is None:
+            raise RuntimeError("Either 'message', 'callback' or 'chat_id' must be provided in data")
 
 
     async def send(
@@ -36,7 +63,7 @@ class Notification:
         notification_type: NotificationType,
         *,
         msg: Optional[str] = None,
-        media: Optional[Dict[str, str]] = None,
+        media: Optional[Union[Dict[str, MediaContent], List[Union[Dict[str, MediaContent], InputMediaPhoto, InputMediaVideo]]]] = None,
         media_caption: Optional[str] = None,
         kbd: Optional[InlineKeyboardMarkup] = None,
         button_text: Optional[List[List[str]]] = None,
@@ -56,7 +83,7 @@ class Notification:
 
         :param notification_type: Notification type (:class:`aiogram_ext.enums.notification_type.NotificationType`)
         :param msg: A string to form a message (4096 characters)
-        :param media: Dictionary, where the key is the media type, the value is file_id
+        :param media: Dictionary, where the key is the media type, the value is file_id, a local path (`pathlib.Path`) or bytes. For `media_group` and `media_apart` also a list of such dictionaries or InputMedia objects, albums are split into groups of 10
         :param media_caption: A string used to form a description of the media
         :param kbd: Ready keyboard object
         :param button_text: List of lists, for forming a message on buttons
@@ -89,4 +116,53 @@ class Notification:
         from aiogram_ext.notification.factory import get_strategy
         strategy = get_strategy(notification_type, self)
 
-        await strategy.send_notification(context)
+        try:
+            await strategy.execute(context)
+        except BaseException:
+            # Tracking writes are recorded only after their API call succeeded, so they are committed
+            # even if a later step failed, without letting a commit error replace the original one.
+            try:
+                await strategy.commit_tracking()
+            except Exception as e:
+                logger.error("Cannot commit tracking of a failed %s notification: %s", notification_type, e, exc_info=True)
+            raise
+
+        await strategy.commit_tracking()
+
+
+    async def broadcast(
+        self,
+        broadcast_id: str,
+        chat_ids: Sequence[int],
+        notification_type: NotificationType,
+        *,
+        sqlite_session_pool: Optional[async_sessionmaker[AsyncSession]] = None,
+        concurrency: int = 25,
+        **kwargs
+    ) -> "BroadcastStats":
+        """
+        Use this method to send a notification to many chats.
+
+        Progress is checkpointed under `broadcast_id`: calling the method again with the same ID
+        and chat list resumes an interrupted broadcast. Chats that blocked the bot are remembered
+        and skipped by later broadcasts until the block expires or is lifted. See :class:`aiogram_ext.notification.broadcast.Broadcast`.
+
+        **NOTE**: Only `info`, `media`, `media_apart`, `media_group` and `auto_delay` notifications can be broadcast.
+
+        :param broadcast_id: Unique name of the broadcast
+        :param chat_ids: Target chat IDs, in a stable order
+        :param notification_type: Notification type (:class:`aiogram_ext.enums.notification_type.NotificationType`)
+        :param sqlite_session_pool: Session maker for checkpoints. Defaults to the built-in sqlite session maker
+        :param concurrency: Number of concurrent deliveries. Defaults to 25
+        :param kwargs: Parameters of :meth:`send`
+        :return: :class:`aiogram_ext.notification.broadcast.BroadcastStats` of the run
+        """
+
+        from aiogram_ext.notification.broadcast import Broadcast
+
+        if sqlite_session_pool is None:
+            from aiogram_ext.storage.sqlite_storage.engine import sqlite_session_maker
+            sqlite_session_pool = sqlite_session_maker
+
+        broadcast = Broadcast(self, sqlite_session_pool, concurrency=concurrency)
+        return await broadcast.run(broadcast_id, chat_ids, notification_type, **kwargs)
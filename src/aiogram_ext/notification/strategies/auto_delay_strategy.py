@@ -9,9 +9,10 @@ class AutoDelayStrategy(NotificationStrategy):
     async def send_notification(self, context: NotificationContext):
         msg = await self.bot.send_message(chat_id=self.chat_id, text=context.msg)
 
+        if self.notification.timers is not None:
+            await self.notification.timers.schedule_delete(self.chat_id, [msg.message_id], context.delay_time)
+            return
+
         await asyncio.sleep(context.delay_time)
 
-        try:
-            await self.bot.delete_message(chat_id=self.chat_id, message_id=msg.message_id)
-        except Exception:
-            pass
+        await self._delete_messages([msg.message_id])
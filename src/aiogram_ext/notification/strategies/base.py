@@ -1,11 +1,21 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Awaitable, List, Optional
 
 from aiogram import Bot
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import InlineKeyboardMarkup, Message, CallbackQuery
+
+from aiogram_ext.keyboard.keyboard import Keyboard
+from aiogram_ext.keyboard.payload_store import CallbackPayloadStore
+from aiogram_ext.media.file_cache import FileIdCache
 
 from aiogram_ext.notification.context import NotificationContext
+from aiogram_ext.notification.deleter import MessageDeleter
+from aiogram_ext.notification.menu_state import MenuRenderState
 from aiogram_ext.notification.notification import Notification
+from aiogram_ext.storage.sqlite_storage.ledger import MessageLedger
+from aiogram_ext.storage.sqlite_storage.models import TableMenuMessage, TableNotificationMessage
+from aiogram_ext.storage.sqlite_storage.outbox import TrackingAction, TrackingOutbox, TrackingWrite
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -13,6 +23,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 class NotificationStrategy(ABC):
     def __init__(self, notification: Notification):
         self.notification = notification
+        self._tracking_writes: List[TrackingWrite] = []
 
     @property
     def bot(self) -> Bot:
@@ -22,6 +33,30 @@ class NotificationStrategy(ABC):
     def sqlite_session(self) -> AsyncSession:
         return self.notification.sqlite_session
 
+    @property
+    def ledger(self) -> Optional[MessageLedger]:
+        return self.notification.ledger
+
+    @property
+    def outbox(self) -> Optional[TrackingOutbox]:
+        return self.notification.outbox
+
+    @property
+    def deleter(self) -> MessageDeleter:
+        return self.notification.deleter
+
+    @property
+    def menu_state(self) -> MenuRenderState:
+        return MenuRenderState.for_bot(self.bot)
+
+    @property
+    def payload_store(self) -> Optional[CallbackPayloadStore]:
+        return self.notification.payload_store
+
+    @property
+    def file_cache(self) -> Optional[FileIdCache]:
+        return self.notification.file_cache
+
     @property
     def message(self) -> Optional[Message]:
         return self.notification.message
@@ -32,7 +67,9 @@ class NotificationStrategy(ABC):
 
     @property
     def chat_id(self) -> int:
-        if self.message:
+        if self.notification.chat_id is not None:
+            return self.notification.chat_id
+        elif self.message:
             return self.message.chat.id
         elif self.callback:
             return self.callback.message.chat.id
@@ -41,3 +78,114 @@ class NotificationStrategy(ABC):
     @abstractmethod
     async def send_notification(self, context: NotificationContext):
         pass
+
+    def independent_steps(self, context: NotificationContext) -> List[Awaitable]:
+        """Steps that do not depend on `send_notification`, such as cleanup deletes.
+
+        They run concurrently with it. Tracking writes belong in `send_notification`,
+        after the API call they record.
+        """
+
+        return []
+
+    async def execute(self, context: NotificationContext) -> None:
+        """Runs `send_notification` together with the independent steps.
+
+        Every step is awaited before returning, the first error is raised afterwards.
+        """
+
+        steps = self.independent_steps(context)
+        if not steps:
+            await self.send_notification(context)
+            return
+
+        results = await asyncio.gather(self.send_notification(context), *steps, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _callback_keyboard(self, context: NotificationContext, key: str) -> InlineKeyboardMarkup:
+        """Builds the keyboard from `button_text`/`callback_data`, through the payload store when one is set."""
+
+        if self.payload_store is not None:
+            return await Keyboard.constructor_stored_callback_btns(
+                self.payload_store,
+                button_text=context.button_text,
+                callback_data=context.callback_data,
+                key=key,
+                sizes=context.sizes
+            )
+
+        return Keyboard.constructor_callback_btns(
+            button_text=context.button_text,
+            callback_data=context.callback_data,
+            key=key,
+            sizes=context.sizes
+        )
+
+    async def _delete_messages(self, msg_ids: List[int]) -> List[int]:
+        """Deletes messages in the current chat through the shared deleter, returns the failed IDs."""
+
+        return await self.deleter.delete(self.chat_id, msg_ids)
+
+    async def commit_tracking(self) -> None:
+        """Commits the tracking writes recorded for the outbox, if any."""
+
+        writes, self._tracking_writes = self._tracking_writes, []
+        if writes:
+            await self.outbox.commit(writes)
+
+    # Message tracking goes through the ledger when one is configured, then through the outbox,
+    # otherwise straight to the handler's SQLite session.
+
+    async def _get_last_menus(self) -> List[int]:
+        if self.ledger is not None:
+            return self.ledger.get_last_menus(self.chat_id)
+        if self.outbox is not None:
+            return await self.outbox.get_last_menus(self.chat_id)
+        return list(await TableMenuMessage.get_last_menus(self.chat_id, self.sqlite_session))
+
+    async def _save_menus(self, msg_ids: List[int]) -> None:
+        if self.ledger is not None:
+            self.ledger.save_menu_message_id(self.chat_id, msg_ids)
+            return
+        if self.outbox is not None:
+            self._tracking_writes.append(TrackingWrite(TrackingAction.SAVE_MENUS, self.chat_id, list(msg_ids)))
+            return
+        await TableMenuMessage.save_menu_message_id(self.chat_id, msg_ids, self.sqlite_session)
+
+    async def _close_menus(self, msg_ids: List[int]) -> bool:
+        if self.ledger is not None:
+            return self.ledger.close_last_menus(self.chat_id, msg_ids)
+        if self.outbox is not None:
+            self._tracking_writes.append(TrackingWrite(TrackingAction.CLOSE_MENUS, self.chat_id, list(msg_ids)))
+            return bool(msg_ids)
+        return await TableMenuMessage.close_last_menus(self.chat_id, msg_ids, self.sqlite_session)
+
+    async def _get_last_notifications(self) -> List[int]:
+        if self.ledger is not None:
+            return self.ledger.get_last_notifications(self.chat_id)
+        if self.outbox is not None:
+            return await self.outbox.get_last_notifications(self.chat_id)
+        return list(await TableNotificationMessage.get_last_notifications(self.chat_id, self.sqlite_session))
+
+    async def _save_notifications(self, msg_ids: List[int], key: str) -> None:
+        if self.ledger is not None:
+            self.ledger.save_notification_message_id(self.chat_id, msg_ids, key)
+            return
+        if self.outbox is not None:
+            self._tracking_writes.append(
+                TrackingWrite(TrackingAction.SAVE_NOTIFICATIONS, self.chat_id, list(msg_ids), key)
+            )
+            return
+        await TableNotificationMessage.save_notification_message_id(self.chat_id, msg_ids, key, self.sqlite_session)
+
+    async def _close_notifications(self, msg_ids: List[int]) -> bool:
+        if self.ledger is not None:
+            return self.ledger.close_last_notifications(self.chat_id, msg_ids)
+        if self.outbox is not None:
+            self._tracking_writes.append(
+                TrackingWrite(TrackingAction.CLOSE_NOTIFICATIONS, self.chat_id, list(msg_ids))
+            )
+            return bool(msg_ids)
+        return await TableNotificationMessage.close_last_notifications(self.chat_id, msg_ids, self.sqlite_session)
@@ -1,19 +1,19 @@
 from aiogram_ext.notification.context import NotificationContext
 from aiogram_ext.notification.strategies.base import NotificationStrategy
-from aiogram_ext.storage.sqlite_storage.models import TableMenuMessage
 
 
 class CloseMenuStrategy(NotificationStrategy):
 
     async def send_notification(self, context: NotificationContext):
-        records = await TableMenuMessage.get_last_menus(self.chat_id, self.sqlite_session)
+        records = await self._get_last_menus()
+        self.menu_state.forget(self.chat_id, records)
 
         try:
-            await self.bot.delete_messages(chat_id=self.chat_id, message_ids=records)
+            await self._delete_messages(records)
         except Exception:
             pass
 
         try:
-            await TableMenuMessage.close_last_menus(self.chat_id, records, self.sqlite_session)
+            await self._close_menus(records)
         except Exception:
             pass
@@ -0,0 +1,14 @@
+from typing import Awaitable, List
+
+from aiogram_ext.notification.context import NotificationContext
+from aiogram_ext.notification.strategies.media_group_strategy import MediaGroupStrategy
+
+
+class DialogMediaGroupStrategy(MediaGroupStrategy):
+
+    def independent_steps(self, context: NotificationContext) -> List[Awaitable]:
+        bot_last_msg_ids = context.bot_last_msg_id or []
+        if isinstance(bot_last_msg_ids, int):
+            bot_last_msg_ids = [bot_last_msg_ids]
+
+        return [self._delete_messages([self.message.message_id, *bot_last_msg_ids])]
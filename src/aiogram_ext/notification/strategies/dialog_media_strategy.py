@@ -1,9 +1,10 @@
+from typing import Awaitable, List
+
 from aiogram_ext.notification.context import NotificationContext
 from aiogram_ext.notification.strategies.media_strategy import MediaStrategy
 
 
 class DialogMediaStrategy(MediaStrategy):
 
-    async def send_notification(self, context: NotificationContext):
-        await self.message.delete()
-        await super().send_notification(context)
+    def independent_steps(self, context: NotificationContext) -> List[Awaitable]:
+        return [self._delete_messages([self.message.message_id])]
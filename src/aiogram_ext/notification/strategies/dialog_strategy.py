@@ -1,17 +1,14 @@
+from typing import Awaitable, List
+
 from aiogram_ext.notification.strategies.info_strategy import InfoStrategy
 from aiogram_ext.notification.context import NotificationContext
 
 
 class DialogStrategy(InfoStrategy):
 
-    async def send_notification(self, context: NotificationContext):
-        await self.message.delete()
-        try:
-            await self.bot.delete_message(
-                chat_id=self.chat_id,
-                message_id=context.bot_last_msg_id
-            )
-        except Exception:
-            pass
+    def independent_steps(self, context: NotificationContext) -> List[Awaitable]:
+        bot_last_msg_ids = context.bot_last_msg_id or []
+        if isinstance(bot_last_msg_ids, int):
+            bot_last_msg_ids = [bot_last_msg_ids]
 
-        await super().send_notification(context)
+        return [self._delete_messages([self.message.message_id, *bot_last_msg_ids])]
@@ -1,39 +1,74 @@
+import logging
+
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import InputMediaPhoto
 
 from aiogram_ext.notification.context import NotificationContext
 from aiogram_ext.notification.strategies.base import NotificationStrategy
-from aiogram_ext.storage.sqlite_storage.models import TableMenuMessage
+
+logger = logging.getLogger(__name__)
 
 
 class EditMenuStrategy(NotificationStrategy):
+    """Edits the last menu message in place.
+
+    The edit is skipped when the message already shows the same menu, and only the keyboard
+    is replaced when the content is unchanged.
+    """
 
     async def send_notification(self, context: NotificationContext):
-        all_msgs = await TableMenuMessage.get_last_menus(self.chat_id, self.sqlite_session)
+        all_msgs = await self._get_last_menus()
 
         last_msg_id = all_msgs[-1]
 
         old_msgs = all_msgs[:-1]
-        for msg_id in old_msgs:
-            try:
-                await self.bot.delete_message(chat_id=self.chat_id, message_id=msg_id)
-            except Exception:
-                pass
+        if old_msgs:
+            await self._delete_messages(old_msgs)
+            self.menu_state.forget(self.chat_id, old_msgs)
 
-        await TableMenuMessage.close_last_menus(self.chat_id, old_msgs, self.sqlite_session)
+        await self._close_menus(old_msgs)
 
         if isinstance(context.media, InputMediaPhoto):
-            await self.bot.edit_message_media(
-                chat_id=self.chat_id,
-                message_id=last_msg_id,
-                media=context.media,
-                reply_markup=context.kbd
-            )
+            content = context.media
         elif context.media is None:
-            await self.bot.edit_message_text(
-                chat_id=self.chat_id,
-                message_id=last_msg_id,
-                text=context.msg,
-                reply_markup=context.kbd
-            )
+            content = context.msg
         else:
             raise ValueError("Unsupported menu type")
+
+        rendered = self.menu_state.fingerprint(content, context.kbd)
+        current = self.menu_state.get(self.chat_id, last_msg_id)
+
+        try:
+            if current == rendered and rendered[0] is not None:
+                logger.debug("Menu message %d in chat %d is up to date", last_msg_id, self.chat_id)
+
+            elif current is not None and current[0] == rendered[0] and rendered[0] is not None:
+                await self.bot.edit_message_reply_markup(
+                    chat_id=self.chat_id,
+                    message_id=last_msg_id,
+                    reply_markup=context.kbd
+                )
+
+            elif isinstance(content, InputMediaPhoto):
+                await self.bot.edit_message_media(
+                    chat_id=self.chat_id,
+                    message_id=last_msg_id,
+                    media=content,
+                    reply_markup=context.kbd
+                )
+
+            else:
+                await self.bot.edit_message_text(
+                    chat_id=self.chat_id,
+                    message_id=last_msg_id,
+                    text=content,
+                    reply_markup=context.kbd
+                )
+
+        except TelegramBadRequest as e:
+            # The message already shows this menu, e.g. its state was lost on restart.
+            if "message is not modified" not in e.message:
+                self.menu_state.forget(self.chat_id, [last_msg_id])
+                raise
+
+        self.menu_state.set(self.chat_id, last_msg_id, rendered)
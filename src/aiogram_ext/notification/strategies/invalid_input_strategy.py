@@ -1,9 +1,10 @@
+from typing import Awaitable, List
+
 from aiogram_ext.notification.context import NotificationContext
 from aiogram_ext.notification.strategies.info_strategy import InfoStrategy
 
 
 class InvalidInputStrategy(InfoStrategy):
 
-    async def send_notification(self, context: NotificationContext):
-        await self.message.delete()
-        await super().send_notification(context)
+    def independent_steps(self, context: NotificationContext) -> List[Awaitable]:
+        return [self._delete_messages([self.message.message_id])]
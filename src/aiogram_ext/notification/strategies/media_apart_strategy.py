@@ -0,0 +1,7 @@
+from aiogram_ext.notification.strategies.media_group_strategy import MediaGroupStrategy
+
+
+class MediaApartStrategy(MediaGroupStrategy):
+    """Sends media and a separate text message, the keyboard goes with the text."""
+
+    text_required = True
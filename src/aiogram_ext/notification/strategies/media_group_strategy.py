@@ -0,0 +1,138 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from aiogram.types import InlineKeyboardMarkup, InputFile, InputMediaPhoto, InputMediaVideo, Message
+
+from aiogram_ext.keyboard.keyboard import Keyboard
+from aiogram_ext.media.media import MediaContent, NotificationMedia
+from aiogram_ext.notification.context import NotificationContext
+from aiogram_ext.notification.strategies.base import NotificationStrategy
+
+# Telegram accepts 2-10 items per sendMediaGroup call.
+MEDIA_GROUP_LIMIT = 10
+
+InputMedia = Union[InputMediaPhoto, InputMediaVideo]
+
+
+class MediaGroupStrategy(NotificationStrategy):
+    """Sends media as albums of up to 10 items, with an optional text message.
+
+    The text message carries the keyboard and is sent concurrently with the album.
+    """
+
+    text_required = False
+
+    async def send_notification(self, context: NotificationContext):
+        if context.msg is None and (self.text_required or context.kbd is not None or context.button_text is not None):
+            raise ValueError("'msg' must be provided to send a text message or a keyboard with media")
+
+        key = Keyboard.generate_key(self.chat_id)
+        media = self._input_media(context.media, context.media_caption)
+
+        # Filled while the albums go out, so a failed send still leaves the delivered part tracked.
+        album_msg_ids: List[int] = []
+        error: Optional[BaseException] = None
+        text_msg = None
+
+        if context.msg is None:
+            try:
+                await self._send_album(media, album_msg_ids)
+            except Exception as e:
+                error = e
+        else:
+            keyboard = await self._keyboard(context, key)
+            album_result, text_result = await asyncio.gather(
+                self._send_album(media, album_msg_ids),
+                self.bot.send_message(chat_id=self.chat_id, text=context.msg, reply_markup=keyboard),
+                return_exceptions=True
+            )
+            for result in (album_result, text_result):
+                if isinstance(result, BaseException) and error is None:
+                    error = result
+            if not isinstance(text_result, BaseException):
+                text_msg = text_result
+
+        # The album and its text are one notification, `delete_notification` removes them together.
+        msg_ids = [*album_msg_ids, text_msg.message_id] if text_msg is not None else album_msg_ids
+        if msg_ids:
+            await self._save_notifications(msg_ids, key)
+
+        if error is not None:
+            raise error
+
+    async def _keyboard(self, context: NotificationContext, key: str) -> Optional[InlineKeyboardMarkup]:
+        if context.kbd is not None:
+            return context.kbd
+
+        if context.button_text is not None and context.callback_data is not None:
+            return await self._callback_keyboard(context, key)
+
+        return None
+
+    @staticmethod
+    def _input_media(
+        media: Union[Dict[str, MediaContent], Sequence[Union[Dict[str, MediaContent], InputMedia]]],
+        caption: Optional[str]
+    ) -> List[InputMedia]:
+        """Builds InputMedia objects, the caption goes to the first item."""
+
+        if not media:
+            raise ValueError("'media' must be provided")
+
+        items: List[Any] = list(media.items()) if isinstance(media, dict) else list(media)
+
+        input_media: List[InputMedia] = []
+        for item in items:
+            if isinstance(item, tuple):
+                input_media.append(NotificationMedia.create_input_media(*item))
+            elif isinstance(item, dict):
+                input_media.extend(NotificationMedia.create_input_media(*pair) for pair in item.items())
+            else:
+                input_media.append(item)
+
+        if caption is not None and input_media[0].caption is None:
+            input_media[0] = input_media[0].model_copy(update={"caption": caption})
+
+        return input_media
+
+    @staticmethod
+    def _chunks(media: List[InputMedia]) -> List[List[InputMedia]]:
+        """Splits media into albums of up to 10 items, never leaving a single item behind."""
+
+        chunks = [media[i:i + MEDIA_GROUP_LIMIT] for i in range(0, len(media), MEDIA_GROUP_LIMIT)]
+        if len(chunks) > 1 and len(chunks[-1]) == 1:
+            chunks[-1].insert(0, chunks[-2].pop())
+        return chunks
+
+    async def _send_album(self, media: List[InputMedia], msg_ids: List[int]) -> List[int]:
+        """Sends the albums in order, appending the IDs of the sent messages to `msg_ids` as they arrive."""
+
+        for chunk in self._chunks(media):
+            if len(chunk) == 1:
+                msg_ids.append((await self._send_single(chunk[0])).message_id)
+                continue
+
+            if self.file_cache is None:
+                messages = await self.bot.send_media_group(chat_id=self.chat_id, media=chunk)
+            else:
+                chunk, upload_keys = await self.file_cache.prepare(self.bot, chunk)
+                messages = await self.bot.send_media_group(chat_id=self.chat_id, media=chunk)
+                await self.file_cache.remember(chunk, upload_keys, messages)
+
+            msg_ids.extend(message.message_id for message in messages)
+
+        return msg_ids
+
+    async def _send_single(self, media: InputMedia) -> Message:
+        async def send(file: Union[str, InputFile]) -> Message:
+            if isinstance(media, InputMediaPhoto):
+                return await self.bot.send_photo(chat_id=self.chat_id, photo=file, caption=media.caption)
+
+            elif isinstance(media, InputMediaVideo):
+                return await self.bot.send_video(chat_id=self.chat_id, video=file, caption=media.caption)
+
+            raise ValueError("Unsupported InputMedia type")
+
+        if self.file_cache is not None:
+            return await self.file_cache.send(self.bot, media.type, media.media, send)
+        return await send(media.media)
@@ -1,19 +1,19 @@
+from typing import Awaitable, List
+
 from aiogram.types import InputMediaPhoto
 
 from aiogram_ext.notification.context import NotificationContext
 from aiogram_ext.notification.strategies.base import NotificationStrategy
-from aiogram_ext.storage.sqlite_storage.models import TableMenuMessage
 
 
 class StartMenuStrategy(NotificationStrategy):
 
-    async def send_notification(self, context: NotificationContext):
-        try:
-            await self.message.delete()
-        except Exception:
-            pass
+    def independent_steps(self, context: NotificationContext) -> List[Awaitable]:
+        return [self._delete_messages([self.message.message_id])]
 
+    async def send_notification(self, context: NotificationContext):
         if isinstance(context.media, InputMediaPhoto):
+            content = context.media.model_copy(update={"caption": context.msg})
             menu = await self.bot.send_photo(
                 chat_id=self.chat_id,
                 photo=context.media.media,
@@ -22,6 +22,7 @@ class StartMenuStrategy(NotificationStrategy):
             )
 
         elif context.media is None:
+            content = context.msg
             menu = await self.bot.send_message(
                 chat_id=self.chat_id,
                 text=context.msg,
@@ -31,4 +32,5 @@ class StartMenuStrategy(NotificationStrategy):
         else:
             raise ValueError("Unsupported menu type")
 
-        await TableMenuMessage.save_menu_message_id(self.chat_id, [menu.message_id], self.sqlite_session)
+        self.menu_state.set(self.chat_id, menu.message_id, self.menu_state.fingerprint(content, context.kbd))
+        await self._save_menus([menu.message_id])
@@ -0,0 +1,129 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Type, Union
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Route:
+    handler: CallableObject
+    callback_data: Optional[Type[CallbackData]] = None
+
+
+@dataclass
+class _TrieNode:
+    children: Dict[str, "_TrieNode"] = field(default_factory=dict)
+    exact: Optional[_Route] = None
+    prefix: Optional[_Route] = None
+
+
+class CallbackRouter(Router):
+    """Router that dispatches callback queries through a prefix trie.
+
+    Routes are indexed by their callback data when they are registered. A callback query
+    is matched by walking its data once, O(len(data)) no matter how many routes exist,
+    instead of evaluating every handler's filters in turn. An exact route wins over prefix
+    routes, otherwise the longest matching prefix wins.
+
+    Handlers receive the event and the middleware data like regular aiogram handlers, routes
+    registered with a :class:`CallbackData` class also get the unpacked `callback_data`.
+    The router is a regular :class:`Router`, other observers work as usual.
+
+    Exapmles:
+        - :code:`@router.callback(prefix="delete_notification")`
+        - :code:`@router.callback(exact="clear_fsm_state")`
+        - :code:`@router.callback(callback_data=MenuCallBack)`
+    """
+
+    def __init__(self, *, name: Optional[str] = None):
+        super().__init__(name=name)
+        self._root = _TrieNode()
+        self._routes = 0
+        self.callback_query.register(self._dispatch, self._resolve)
+
+    def __len__(self) -> int:
+        return self._routes
+
+    def callback(
+        self,
+        prefix: Optional[str] = None,
+        *,
+        exact: Optional[str] = None,
+        callback_data: Optional[Type[CallbackData]] = None,
+    ) -> Callable:
+        """Decorator form of :meth:`register_callback`."""
+
+        def wrapper(handler: Callable) -> Callable:
+            self.register_callback(handler, prefix=prefix, exact=exact, callback_data=callback_data)
+            return handler
+
+        return wrapper
+
+    def register_callback(
+        self,
+        handler: Callable,
+        *,
+        prefix: Optional[str] = None,
+        exact: Optional[str] = None,
+        callback_data: Optional[Type[CallbackData]] = None,
+    ) -> None:
+        """Registers a handler for callback data equal to `exact`, starting with `prefix`
+        or packed by the `callback_data` class. Exactly one of them must be given."""
+
+        if sum(value is not None for value in (prefix, exact, callback_data)) != 1:
+            raise ValueError("Exactly one of 'prefix', 'exact' or 'callback_data' must be provided")
+
+        route = _Route(CallableObject(handler), callback_data)
+
+        if callback_data is not None:
+            prefix = f"{callback_data.__prefix__}{callback_data.__separator__}"
+
+        key = exact if exact is not None else prefix
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+
+        slot = "exact" if exact is not None else "prefix"
+        if getattr(node, slot) is not None:
+            raise ValueError(f"A callback handler for {slot} '{key}' is already registered")
+
+        setattr(node, slot, route)
+        self._routes += 1
+
+    def match(self, data: str) -> Optional[_Route]:
+        """Returns the route for the callback data, or None."""
+
+        node = self._root
+        best = node.prefix
+
+        for char in data:
+            node = node.children.get(char)
+            if node is None:
+                return best
+            if node.prefix is not None:
+                best = node.prefix
+
+        return node.exact or best
+
+    async def _resolve(self, callback: CallbackQuery) -> Union[bool, Dict[str, Any]]:
+        if callback.data is None or (route := self.match(callback.data)) is None:
+            return False
+
+        result: Dict[str, Any] = {"callback_route": route}
+        if route.callback_data is not None:
+            try:
+                result["callback_data"] = route.callback_data.unpack(callback.data)
+            except (TypeError, ValueError):
+                return False
+
+        return result
+
+    @staticmethod
+    async def _dispatch(event: Any, callback_route: _Route, **data: Any) -> Any:
+        return await callback_route.handler.call(event, **data)
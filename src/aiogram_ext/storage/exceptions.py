@@ -6,3 +6,6 @@ class SqliteDatabaseDropError(Exception):
 
 class SqliteSessionError(Exception):
     """Exception occurs when there is an error in the database session."""
+
+class SqliteDatabaseMigrationError(Exception):
+    """Exception occurs when the database schema cannot be upgraded."""
@@ -0,0 +1,61 @@
+import logging
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class LazySession:
+    """Stand-in for :class:`AsyncSession` that creates the real session on first use.
+
+    Attribute access is forwarded to the real session, which is created the first time
+    the handler touches it. The transaction begins with the first query (SQLAlchemy autobegin).
+    On exit the transaction is committed, or rolled back on error, only if it was actually started.
+
+    Usage:
+        async with LazySession(session_pool) as session:
+            ...
+    """
+
+    __slots__ = ("_session_pool", "_session")
+
+    def __init__(self, session_pool: async_sessionmaker[AsyncSession]):
+        self._session_pool = session_pool
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def started(self) -> bool:
+        """Whether the real session has been created."""
+
+        return self._session is not None
+
+    @property
+    def session(self) -> AsyncSession:
+        """The real session, created on first access."""
+
+        if self._session is None:
+            self._session = self._session_pool()
+            logger.debug("Session opened on first use")
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
+
+    async def __aenter__(self) -> "LazySession":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._session is None:
+            return
+
+        try:
+            if self._session.in_transaction():
+                if exc_type is None:
+                    await self._session.commit()
+                    logger.debug("Transaction completed successfully")
+                else:
+                    await self._session.rollback()
+        finally:
+            await self._session.close()
+            self._session = None
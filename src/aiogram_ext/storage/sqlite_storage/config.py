@@ -1 +1,11 @@
 DB_SQLITE="sqlite+aiosqlite:///sqlite_storage.db"
+
+# Pragmas applied to every connection of a WAL-mode engine (see `create_sqlite_engine`).
+SQLITE_WAL_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,  # 256 MiB
+    "cache_size": -65536,    # 64 MiB
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
@@ -1,13 +1,59 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 
-from ..exceptions import SqliteDatabaseCreationError, SqliteDatabaseDropError
+from ..exceptions import SqliteDatabaseCreationError, SqliteDatabaseDropError, SqliteDatabaseMigrationError
 
-from .config import DB_SQLITE
+from .config import DB_SQLITE, SQLITE_WAL_PRAGMAS
 
+from .migrations import run_migrations
 from .models import Base
 
 
-sqlite_engine = create_async_engine(DB_SQLITE)
+def create_sqlite_engine(
+    url: str = DB_SQLITE,
+    *,
+    wal: bool = False,
+    writer: bool = False,
+    pool_size: int = 5,
+) -> AsyncEngine:
+    """Creates an engine for the sqlite storage.
+
+    :param url: Database URL
+    :param wal: Enable WAL journal and the tuned pragmas from `SQLITE_WAL_PRAGMAS`
+    :param writer: Build a single-connection engine for :class:`SqliteWriter`.
+        Transactions start with `BEGIN IMMEDIATE` and savepoints are supported
+    :param pool_size: Number of pooled read connections, ignored for a writer engine
+    """
+
+    if not wal and not writer:
+        return create_async_engine(url)
+
+    if writer:
+        engine = create_async_engine(url, pool_size=1, max_overflow=0)
+    else:
+        engine = create_async_engine(url, pool_size=pool_size, max_overflow=0)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if writer:
+            # Let SQLAlchemy emit BEGIN itself, otherwise the driver defers it and breaks savepoints.
+            dbapi_connection.isolation_level = None
+
+        if wal:
+            cursor = dbapi_connection.cursor()
+            for pragma, value in SQLITE_WAL_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+            cursor.close()
+
+    if writer:
+        @event.listens_for(engine.sync_engine, "begin")
+        def _on_begin(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+sqlite_engine = create_sqlite_engine()
 
 sqlite_session_maker = async_sessionmaker(bind=sqlite_engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -22,7 +68,19 @@ class SqliteDatabase:
 
         except Exception as e:
             raise SqliteDatabaseCreationError(f"An error occurred while creating tables: {e}") from e
-    
+
+        await self.migrate_sqlite_db()
+
+    async def migrate_sqlite_db(self):
+        """Upgrades an existing database file in place, without dropping any data."""
+
+        try:
+            async with sqlite_engine.begin() as conn:
+                await conn.run_sync(run_migrations)
+
+        except Exception as e:
+            raise SqliteDatabaseMigrationError(f"An error occurred while migrating the database: {e}") from e
+
     async def drop_sqlite_db(self):
         try:
             async with sqlite_engine.begin() as conn:
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .models import TableMenuMessage, TableNotificationMessage
+from .writer import SqliteWriter, run_write
+
+logger = logging.getLogger(__name__)
+
+
+class MessageLedger:
+    """In-process per-chat ledger of menu and notification message IDs.
+
+    Reads are served from memory. Writes are applied to memory at once and queued,
+    the queue is flushed to SQLite in bulk every `flush_interval` seconds or as soon as
+    `flush_threshold` changes are pending. On `start` the ledger is rebuilt from the database.
+
+    Args:
+        sqlite_session_pool: Session maker used for loading and flushing
+        flush_interval: Maximum time between flushes in seconds (default: 1.0)
+        flush_threshold: Number of pending changes that triggers an early flush (default: 500)
+        writer: Optional :class:`SqliteWriter`, see :func:`run_write`
+    """
+
+    def __init__(
+        self,
+        sqlite_session_pool: async_sessionmaker[AsyncSession],
+        flush_interval: float = 1.0,
+        flush_threshold: int = 500,
+        writer: Optional[SqliteWriter] = None,
+    ):
+        self.sqlite_session_pool = sqlite_session_pool
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.writer = writer
+
+        self._menus: Dict[int, List[int]] = {}
+        self._notifications: Dict[int, Dict[int, str]] = {}
+        self._keys: Dict[str, Set[Tuple[int, int]]] = {}
+
+        # Pending changes hold the net effect only: a row added and removed
+        # between two flushes never reaches the database.
+        self._menu_adds: Set[Tuple[int, int]] = set()
+        self._menu_dels: Set[Tuple[int, int]] = set()
+        self._notification_adds: Dict[Tuple[int, int], str] = {}
+        self._notification_dels: Set[Tuple[int, int]] = set()
+
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self.flusher_task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of changes waiting to be flushed."""
+
+        return (
+            len(self._menu_adds) + len(self._menu_dels)
+            + len(self._notification_adds) + len(self._notification_dels)
+        )
+
+    async def start(self) -> None:
+        """Rebuilds the ledger from the database and starts the background flusher."""
+
+        await self.load()
+        self._stopping.clear()
+
+        if not self.flusher_task or self.flusher_task.done():
+            self.flusher_task = asyncio.create_task(self._flusher())
+            logger.info("MessageLedger background flusher has been launched.")
+
+    async def stop(self) -> None:
+        """Stops the background flusher and writes out all pending changes."""
+
+        if self.flusher_task:
+            self._stopping.set()
+            self._wakeup.set()
+            try:
+                await self.flusher_task
+            finally:
+                self.flusher_task = None
+                logger.info("MessageLedger background flusher has been stopped.")
+
+        await self.flush()
+
+    async def load(self) -> None:
+        """Replaces the in-memory state with the rows stored in the database."""
+
+        async with self.sqlite_session_pool() as sqlite_session:
+            menus = await sqlite_session.execute(
+                select(TableMenuMessage.chat_id, TableMenuMessage.msg_id).order_by(TableMenuMessage.msg_id)
+            )
+            notifications = await sqlite_session.execute(
+                select(TableNotificationMessage.chat_id, TableNotificationMessage.msg_id, TableNotificationMessage.key)
+                .order_by(TableNotificationMessage.msg_id)
+            )
+
+            self._menus.clear()
+            self._notifications.clear()
+            self._keys.clear()
+
+            for chat_id, msg_id in menus:
+                self._menus.setdefault(chat_id, []).append(msg_id)
+
+            for chat_id, msg_id, key in notifications:
+                self._notifications.setdefault(chat_id, {})[msg_id] = key
+                self._keys.setdefault(key, set()).add((chat_id, msg_id))
+
+        logger.info("MessageLedger loaded %d menu chats, %d notification chats", len(self._menus), len(self._notifications))
+
+    async def _flusher(self) -> None:
+        """Flushes pending changes on a timer or when the threshold is reached."""
+
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("MessageLedger flush failed, will retry: %s", e, exc_info=True)
+
+    async def flush(self) -> None:
+        """Writes all pending changes to the database in a single transaction."""
+
+        async with self._flush_lock:
+            if not self.pending:
+                return
+
+            menu_adds, self._menu_adds = self._menu_adds, set()
+            menu_dels, self._menu_dels = self._menu_dels, set()
+            notification_adds, self._notification_adds = self._notification_adds, {}
+            notification_dels, self._notification_dels = self._notification_dels, set()
+
+            async def write(sqlite_session: AsyncSession) -> None:
+                await self._delete_rows(TableMenuMessage, menu_dels, sqlite_session)
+                await self._delete_rows(TableNotificationMessage, notification_dels, sqlite_session)
+
+                if menu_adds:
+                    await sqlite_session.execute(
+                        insert(TableMenuMessage),
+                        [{"chat_id": chat_id, "msg_id": msg_id} for chat_id, msg_id in menu_adds]
+                    )
+                if notification_adds:
+                    await sqlite_session.execute(
+                        insert(TableNotificationMessage),
+                        [
+                            {"chat_id": chat_id, "msg_id": msg_id, "key": key}
+                            for (chat_id, msg_id), key in notification_adds.items()
+                        ]
+                    )
+
+            try:
+                await run_write(self.sqlite_session_pool, self.writer, write)
+
+            except Exception:
+                self._requeue(menu_adds, menu_dels, notification_adds, notification_dels)
+                raise
+
+            logger.debug(
+                "MessageLedger flushed %d inserts, %d deletes",
+                len(menu_adds) + len(notification_adds),
+                len(menu_dels) + len(notification_dels)
+            )
+
+    def _requeue(
+        self,
+        menu_adds: Set[Tuple[int, int]],
+        menu_dels: Set[Tuple[int, int]],
+        notification_adds: Dict[Tuple[int, int], str],
+        notification_dels: Set[Tuple[int, int]],
+    ) -> None:
+        """Merges a failed batch back into the pending changes that arrived meanwhile."""
+
+        for row in menu_adds:
+            if row in self._menu_dels:
+                self._menu_dels.discard(row)
+            else:
+                self._menu_adds.add(row)
+
+        for row in menu_dels:
+            if row in self._menu_adds:
+                self._menu_adds.discard(row)
+            else:
+                self._menu_dels.add(row)
+
+        for row, key in notification_adds.items():
+            if row in self._notification_dels:
+                self._notification_dels.discard(row)
+            else:
+                self._notification_adds.setdefault(row, key)
+
+        for row in notification_dels:
+            if row in self._notification_adds:
+                del self._notification_adds[row]
+            else:
+                self._notification_dels.add(row)
+
+    @staticmethod
+    async def _delete_rows(table, rows: Set[Tuple[int, int]], sqlite_session: AsyncSession) -> None:
+        by_chat: Dict[int, List[int]] = {}
+        for chat_id, msg_id in rows:
+            by_chat.setdefault(chat_id, []).append(msg_id)
+
+        for chat_id, msg_ids in by_chat.items():
+            await sqlite_session.execute(
+                delete(table).where((table.chat_id == chat_id) & (table.msg_id.in_(msg_ids)))
+            )
+
+    def _changed(self) -> None:
+        if self.pending >= self.flush_threshold:
+            self._wakeup.set()
+
+    ###############################################################################################
+    def save_menu_message_id(self, chat_id: int, msg_ids: List[int]) -> None:
+        """Saves multiple IDs of menu-messages."""
+
+        menus = self._menus.setdefault(chat_id, [])
+        for msg_id in msg_ids:
+            if msg_id in menus:
+                continue
+            menus.append(msg_id)
+
+            row = (chat_id, msg_id)
+            if row in self._menu_dels:
+                self._menu_dels.discard(row)
+            else:
+                self._menu_adds.add(row)
+
+        menus.sort()
+        self._changed()
+
+    def get_last_menus(self, chat_id: int) -> List[int]:
+        return list(self._menus.get(chat_id, ()))
+
+    def close_last_menus(self, chat_id: int, msg_ids: List[int]) -> bool:
+        menus = self._menus.get(chat_id)
+        if not menus:
+            return False
+
+        closed = set(msg_ids) & set(menus)
+        for msg_id in closed:
+            menus.remove(msg_id)
+
+            row = (chat_id, msg_id)
+            if row in self._menu_adds:
+                self._menu_adds.discard(row)
+            else:
+                self._menu_dels.add(row)
+
+        if not menus:
+            del self._menus[chat_id]
+
+        self._changed()
+        return bool(closed)
+
+    ###############################################################################################
+    def save_notification_message_id(self, chat_id: int, msg_ids: List[int], key: str) -> None:
+        """Saves multiple IDs of notification-messages."""
+
+        notifications = self._notifications.setdefault(chat_id, {})
+        for msg_id in msg_ids:
+            row = (chat_id, msg_id)
+            if (previous := notifications.get(msg_id)) is not None and previous != key:
+                self._forget_key(previous, row)
+            notifications[msg_id] = key
+            self._keys.setdefault(key, set()).add(row)
+
+            if row in self._notification_dels:
+                self._notification_dels.discard(row)
+            else:
+                self._notification_adds[row] = key
+
+        self._changed()
+
+    def get_last_notifications(self, chat_id: int) -> List[int]:
+        return sorted(self._notifications.get(chat_id, ()))
+
+    def close_last_notifications(self, chat_id: int, msg_ids: List[int]) -> bool:
+        notifications = self._notifications.get(chat_id)
+        if not notifications:
+            return False
+
+        closed = [msg_id for msg_id in msg_ids if msg_id in notifications]
+        for msg_id in closed:
+            row = (chat_id, msg_id)
+            self._forget_key(notifications.pop(msg_id), row)
+            if row in self._notification_adds:
+                del self._notification_adds[row]
+            else:
+                self._notification_dels.add(row)
+
+        if not notifications:
+            del self._notifications[chat_id]
+
+        self._changed()
+        return bool(closed)
+
+    def _forget_key(self, key: str, row: Tuple[int, int]) -> None:
+        rows = self._keys.get(key)
+        if rows is None:
+            return
+
+        rows.discard(row)
+        if not rows:
+            del self._keys[key]
+
+    def get_notifications_by_key(self, key: str) -> List[TableNotificationMessage]:
+        """Returns detached records of every message of the notification with the key."""
+
+        return [
+            TableNotificationMessage(chat_id=chat_id, msg_id=msg_id, key=key)
+            for chat_id, msg_id in sorted(self._keys.get(key, ()))
+        ]
+
+    def close_last_notification_by_key(self, key: str) -> bool:
+        by_chat: Dict[int, List[int]] = {}
+        for chat_id, msg_id in self._keys.get(key, ()):
+            by_chat.setdefault(chat_id, []).append(msg_id)
+
+        closed = False
+        for chat_id, msg_ids in by_chat.items():
+            closed = self.close_last_notifications(chat_id, msg_ids) or closed
+        return closed
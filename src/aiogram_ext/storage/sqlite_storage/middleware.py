@@ -6,6 +6,8 @@ from aiogram.types import TelegramObject
 
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
+from ..lazy_session import LazySession
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,6 +17,9 @@ class SqliteSessionMiddleware(BaseMiddleware):
     **NOTE**: If you need to execute multiple database queries in one handler, they will be executed within a single transaction.
 
     **NOTE**: There is no need to explicitly write `commit`, `rollback` and `close`, the context manager does this.
+
+    **NOTE**: The session is lazy (:class:`LazySession`): updates whose handler never queries the database
+    do not open a session or a transaction at all.
     """
 
     def __init__(self, sqlite_session_pool: async_sessionmaker[AsyncSession]):
@@ -27,20 +32,13 @@ class SqliteSessionMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        async with self.sqlite_session_pool() as sqlite_session:
+        async with LazySession(self.sqlite_session_pool) as sqlite_session:
             data["sqlite_session"] = sqlite_session
-            logger.debug("Sqlite session created for handler")
 
             try:
-                async with sqlite_session.begin():
-                    logger.debug("Transaction started")
-                    result = await handler(event, data)
-                    logger.debug("Transaction completed successfully")
-                    return result
+                return await handler(event, data)
 
             except Exception as e:
-                logger.error("Transaction rolled back due to error: %s", e, exc_info=True)
+                if sqlite_session.started:
+                    logger.error("Transaction rolled back due to error: %s", e, exc_info=True)
                 raise
-
-            finally:
-                logger.debug("Sqlite session closed.")
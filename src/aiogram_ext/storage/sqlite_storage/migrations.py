@@ -0,0 +1,156 @@
+import logging
+import time
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Connection, inspect
+
+from .models import (
+    TableBlockedChat,
+    TableBroadcast,
+    TableCallbackPayload,
+    TableMediaFile,
+    TableMenu,
+    TableMenuMessage,
+    TableNotificationMessage,
+    TableTimer,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _message_indexes(conn: Connection) -> None:
+    """Adds composite (chat_id, msg_id) indexes to the message-tracking tables."""
+
+    for table in (TableNotificationMessage.__table__, TableMenuMessage.__table__):
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _timers_table(conn: Connection) -> None:
+    """Adds the table of pending timers."""
+
+    TableTimer.__table__.create(conn, checkfirst=True)
+
+
+def _broadcast_tables(conn: Connection) -> None:
+    """Adds the tables of broadcast progress and blocked chats."""
+
+    TableBroadcast.__table__.create(conn, checkfirst=True)
+    TableBlockedChat.__table__.create(conn, checkfirst=True)
+
+
+def _callback_payloads_table(conn: Connection) -> None:
+    """Adds the table of stored callback payloads."""
+
+    TableCallbackPayload.__table__.create(conn, checkfirst=True)
+
+
+def _menu_banner_hash(conn: Connection) -> None:
+    """Adds the banner content hash to the menus table."""
+
+    table = TableMenu.__tablename__
+    if not inspect(conn).has_table(table):
+        TableMenu.__table__.create(conn)
+        return
+
+    columns = {column["name"] for column in inspect(conn).get_columns(table)}
+    if "banner_hash" not in columns:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN banner_hash TEXT")
+
+
+def _media_files_table(conn: Connection) -> None:
+    """Adds the file_id cache of uploaded media."""
+
+    TableMediaFile.__table__.create(conn, checkfirst=True)
+
+
+def _notification_key_not_unique(conn: Connection) -> None:
+    """Lets several messages share one notification key.
+
+    SQLite cannot drop a UNIQUE constraint, so the table is rebuilt and its rows copied over.
+    """
+
+    table = TableNotificationMessage.__tablename__
+    inspector = inspect(conn)
+    if not inspector.has_table(table):
+        TableNotificationMessage.__table__.create(conn)
+        return
+
+    unique = any(constraint["column_names"] == ["key"] for constraint in inspector.get_unique_constraints(table)) or any(
+        index["unique"] and index["column_names"] == ["key"] for index in inspector.get_indexes(table)
+    )
+
+    if unique:
+        old_table = f"{table}_old"
+        old_indexes = [index["name"] for index in inspector.get_indexes(table)]
+        columns = ", ".join(
+            column["name"] for column in inspector.get_columns(table)
+            if column["name"] in TableNotificationMessage.__table__.columns
+        )
+
+        conn.exec_driver_sql(f"ALTER TABLE {table} RENAME TO {old_table}")
+        for name in old_indexes:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+        TableNotificationMessage.__table__.create(conn)
+        conn.exec_driver_sql(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {old_table}")
+        conn.exec_driver_sql(f"DROP TABLE {old_table}")
+        return
+
+    for index in TableNotificationMessage.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _blocked_chat_time(conn: Connection) -> None:
+    """Adds the time of blocking to the blocked chats, so blocks can expire.
+
+    Chats blocked before the upgrade count as blocked at upgrade time.
+    """
+
+    table = TableBlockedChat.__tablename__
+    if not inspect(conn).has_table(table):
+        TableBlockedChat.__table__.create(conn)
+        return
+
+    columns = {column["name"] for column in inspect(conn).get_columns(table)}
+    if "blocked_at" not in columns:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN blocked_at FLOAT NOT NULL DEFAULT {time.time()}")
+
+
+# (schema version, upgrade step). Steps are applied in order and must be idempotent,
+# a freshly created database already has everything `create_all` knows about.
+MIGRATIONS: List[Tuple[int, Callable[[Connection], None]]] = [
+    (1, _message_indexes),
+    (2, _timers_table),
+    (3, _broadcast_tables),
+    (4, _callback_payloads_table),
+    (5, _menu_banner_hash),
+    (6, _media_files_table),
+    (7, _notification_key_not_unique),
+    (8, _blocked_chat_time),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: Connection) -> int:
+    """Returns the schema version stored in the database file."""
+
+    return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def run_migrations(conn: Connection) -> int:
+    """Upgrades the database in place to `SCHEMA_VERSION`, returns the resulting version."""
+
+    version = get_schema_version(conn)
+
+    for target, step in MIGRATIONS:
+        if target <= version:
+            continue
+
+        step(conn)
+        conn.exec_driver_sql(f"PRAGMA user_version = {target}")
+        logger.info("Sqlite storage migrated to schema version %d", target)
+        version = target
+
+    return version
@@ -1,13 +1,15 @@
 from datetime import datetime
 import logging
 import os
-from typing import Optional
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 from aiogram import Bot
 
 from aiogram.types import FSInputFile
 
-from sqlalchemy import TIMESTAMP, BigInteger, Text, delete, select
+from sqlalchemy import TIMESTAMP, BigInteger, Boolean, Float, Index, Integer, Row, Text, delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
@@ -39,14 +41,18 @@ class TableNotificationMessage(Base):
 
         - chat_id (int, BigInteger): ID of the chat to which the message(notification) was sent.
         - msg_id (int, BigInteger): message_id of the message(notification) on the telegram servers.
-        - key (str): Identification key
+        - key (str): Identification key, shared by all messages of one notification (e.g. an album and its text).
     """
 
     __tablename__ = "table_notification_messages"
+    __table_args__ = (
+        Index("ix_table_notification_messages_chat_id_msg_id", "chat_id", "msg_id"),
+        Index("ix_table_notification_messages_key", "key"),
+    )
 
     chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     msg_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
-    key: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
+    key: Mapped[str] = mapped_column(Text, nullable=False)
 
     @classmethod
     async def save_notification_message_id(
@@ -70,7 +76,7 @@ class TableNotificationMessage(Base):
         chat_id: int,
         sqlite_session: AsyncSession
     ):
-        stmt = select(cls.msg_id).where(cls.chat_id == chat_id)
+        stmt = select(cls.msg_id).where(cls.chat_id == chat_id).order_by(cls.msg_id)
         result = await sqlite_session.execute(stmt)
         records = result.scalars().all()
         return records
@@ -92,9 +98,21 @@ class TableNotificationMessage(Base):
         key: str,
         sqlite_session: AsyncSession
     ):
-        stmt = select(cls).where(cls.key == key)
+        stmt = select(cls).where(cls.key == key).order_by(cls.msg_id)
         result = await sqlite_session.execute(stmt)
-        return result.scalar_one_or_none()
+        return result.scalars().first()
+
+    @classmethod
+    async def get_notifications_by_key(
+        cls,
+        key: str,
+        sqlite_session: AsyncSession
+    ):
+        """Returns every message of the notification with the key."""
+
+        stmt = select(cls).where(cls.key == key).order_by(cls.msg_id)
+        result = await sqlite_session.execute(stmt)
+        return result.scalars().all()
 
     @classmethod
     async def close_last_notification_by_key(
@@ -116,6 +134,7 @@ class TableMenu(Base):
         - name (str, unique): Menu name.
         - text (str): Text for message or caption.
         - file_id (str): file_id of the image for the menu on telegram servers.
+        - banner_hash (str): Content hash of the uploaded banner file.
     """
 
     __tablename__ = "table_menus"
@@ -123,6 +142,7 @@ class TableMenu(Base):
     name: Mapped[str] = mapped_column(Text, unique=True)
     text: Mapped[str] = mapped_column(Text, nullable=False)
     file_id: Mapped[str] = mapped_column(Text, nullable=True)
+    banner_hash: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     @classmethod
     async def get_by_menu_name(
@@ -143,9 +163,13 @@ class TableMenu(Base):
         name: str,
         text: str,
         sqlite_session: AsyncSession,
-        bot: Bot
+        bot: Bot,
+        banner_hash: Optional[str] = None
     ) -> Optional["TableMenu"]:
-        """The method uploads images for the menu to the telegram servers, then saves its file_id."""
+        """The method uploads images for the menu to the telegram servers, then saves its file_id.
+
+        An existing record of the menu is updated in place.
+        """
 
         try:
             banner_file = FSInputFile(path)
@@ -153,10 +177,16 @@ class TableMenu(Base):
             msg = await bot.send_photo(chat_id=chat_id, photo=banner_file, caption=text)
             file_id = msg.photo[-1].file_id
 
-            new_record = cls(name=name, file_id=file_id, text=text)
-            sqlite_session.add(new_record)
+            record = await cls.get_by_menu_name(name, sqlite_session)
+            if record is None:
+                record = cls(name=name, file_id=file_id, text=text, banner_hash=banner_hash)
+                sqlite_session.add(record)
+            else:
+                record.file_id = file_id
+                record.text = text
+                record.banner_hash = banner_hash
 
-            return new_record
+            return record
 
         except Exception as e:
             logger.error("Error storing banner for '%s' from path '%s': %s", name, path, e)
@@ -174,6 +204,9 @@ class TableMenuMessage(Base):
     """
 
     __tablename__ = "table_menu_message"
+    __table_args__ = (
+        Index("ix_table_menu_message_chat_id_msg_id", "chat_id", "msg_id"),
+    )
 
     chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     msg_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
@@ -199,7 +232,7 @@ class TableMenuMessage(Base):
         chat_id: int,
         sqlite_session: AsyncSession
     ):
-        stmt = select(cls.msg_id).where(cls.chat_id == chat_id)
+        stmt = select(cls.msg_id).where(cls.chat_id == chat_id).order_by(cls.msg_id)
         result = await sqlite_session.execute(stmt)
         records = result.scalars().all()
         return records
@@ -214,3 +247,301 @@ class TableMenuMessage(Base):
         stmt = delete(cls).where((cls.chat_id == chat_id) & (cls.msg_id.in_(msg_ids)))
         result = await sqlite_session.execute(stmt)
         return result.rowcount > 0
+
+
+###################################################################################################
+class TableTimer(Base):
+    """Model for storing pending timers (scheduled deletions and messages).
+
+    fields:
+
+        - fire_at (float): Unix time at which the timer fires.
+        - action (str): What to do when the timer fires.
+        - chat_id (int, BigInteger): ID of the chat the action applies to.
+        - payload (str): JSON-encoded action arguments.
+    """
+
+    __tablename__ = "table_timers"
+    __table_args__ = (
+        Index("ix_table_timers_fire_at", "fire_at"),
+    )
+
+    fire_at: Mapped[float] = mapped_column(Float, nullable=False)
+    action: Mapped[str] = mapped_column(Text, nullable=False)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+
+    @classmethod
+    async def add_timer(
+        cls,
+        fire_at: float,
+        action: str,
+        chat_id: int,
+        payload: str,
+        sqlite_session: AsyncSession
+    ) -> int:
+        """Saves a timer and returns its ID."""
+
+        record = cls(fire_at=fire_at, action=action, chat_id=chat_id, payload=payload)
+        sqlite_session.add(record)
+        await sqlite_session.flush()
+        return record.id
+
+    @classmethod
+    async def get_pending_timers(
+        cls,
+        sqlite_session: AsyncSession
+    ) -> Sequence[Row]:
+        """Returns (id, fire_at, action, chat_id, payload) rows ordered by fire time."""
+
+        stmt = select(cls.id, cls.fire_at, cls.action, cls.chat_id, cls.payload).order_by(cls.fire_at)
+        result = await sqlite_session.execute(stmt)
+        return result.all()
+
+    @classmethod
+    async def delete_timers(
+        cls,
+        timer_ids: List[int],
+        sqlite_session: AsyncSession
+    ):
+        stmt = delete(cls).where(cls.id.in_(timer_ids))
+        result = await sqlite_session.execute(stmt)
+        return result.rowcount > 0
+
+    @classmethod
+    async def reschedule_timers(
+        cls,
+        timers: Dict[int, Tuple[float, str]],
+        sqlite_session: AsyncSession
+    ):
+        """Moves timers to a new fire time with a new payload, `timers` maps ID to (fire_at, payload)."""
+
+        for timer_id, (fire_at, payload) in timers.items():
+            await sqlite_session.execute(
+                update(cls).where(cls.id == timer_id).values(fire_at=fire_at, payload=payload)
+            )
+
+
+###################################################################################################
+class TableBroadcast(Base):
+    """Model for storing broadcast progress.
+
+    fields:
+
+        - name (str, unique): Broadcast ID.
+        - total (int): Number of target chats.
+        - cursor (int): Every target before this index has been processed.
+        - sent (int): Number of delivered notifications.
+        - failed (int): Number of failed deliveries.
+        - blocked (int): Number of chats that blocked the bot or were deactivated.
+        - finished (bool): Whether the broadcast is complete.
+    """
+
+    __tablename__ = "table_broadcasts"
+
+    name: Mapped[str] = mapped_column(Text, unique=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False)
+    cursor: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sent: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    blocked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    finished: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    @classmethod
+    async def get_by_name(
+        cls,
+        name: str,
+        sqlite_session: AsyncSession
+    ) -> Optional["TableBroadcast"]:
+        stmt = select(cls).where(cls.name == name)
+        result = await sqlite_session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    @classmethod
+    async def save_progress(
+        cls,
+        name: str,
+        progress: Dict[str, int],
+        sqlite_session: AsyncSession
+    ):
+        """Creates or updates the progress record of a broadcast."""
+
+        stmt = sqlite_insert(cls).values(name=name, **progress)
+        stmt = stmt.on_conflict_do_update(index_elements=[cls.name], set_=progress)
+        await sqlite_session.execute(stmt)
+
+
+###################################################################################################
+class TableBlockedChat(Base):
+    """Model for storing chats that cannot receive messages.
+
+    fields:
+
+        - chat_id (int, BigInteger, unique): ID of the chat.
+        - reason (str): Error returned by Telegram.
+        - blocked_at (float): Unix time of the last failed delivery.
+    """
+
+    __tablename__ = "table_blocked_chats"
+
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False, unique=True)
+    reason: Mapped[str] = mapped_column(Text, nullable=False)
+    blocked_at: Mapped[float] = mapped_column(Float, nullable=False, default=time.time)
+
+    @classmethod
+    async def get_blocked_chat_ids(
+        cls,
+        sqlite_session: AsyncSession,
+        since: Optional[float] = None
+    ) -> Set[int]:
+        """Returns the blocked chats, only those blocked at or after `since` if it is given."""
+
+        stmt = select(cls.chat_id)
+        if since is not None:
+            stmt = stmt.where(cls.blocked_at >= since)
+        result = await sqlite_session.execute(stmt)
+        return set(result.scalars().all())
+
+    @classmethod
+    async def save_blocked_chats(
+        cls,
+        chats: Dict[int, str],
+        sqlite_session: AsyncSession
+    ):
+        """Saves multiple blocked chats in one statement, already known chats get the new reason and time."""
+
+        if not chats:
+            return
+
+        now = time.time()
+        stmt = sqlite_insert(cls)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.chat_id],
+            set_={"reason": stmt.excluded.reason, "blocked_at": stmt.excluded.blocked_at}
+        )
+        await sqlite_session.execute(
+            stmt, [{"chat_id": chat_id, "reason": reason, "blocked_at": now} for chat_id, reason in chats.items()]
+        )
+
+    @classmethod
+    async def unblock_chats(
+        cls,
+        chat_ids: Iterable[int],
+        sqlite_session: AsyncSession
+    ) -> int:
+        """Removes the chats from the blocked list, returns the number of removed rows."""
+
+        chat_ids = list(chat_ids)
+        if not chat_ids:
+            return 0
+
+        result = await sqlite_session.execute(delete(cls).where(cls.chat_id.in_(chat_ids)))
+        return result.rowcount
+
+
+###################################################################################################
+class TableCallbackPayload(Base):
+    """Model for storing callback payloads referenced by short tokens in `callback_data`.
+
+    fields:
+
+        - token (str, unique): Token packed into the button.
+        - payload (str): The real callback payload.
+        - expires_at (float): Unix time after which the token is no longer valid.
+    """
+
+    __tablename__ = "table_callback_payloads"
+    __table_args__ = (
+        Index("ix_table_callback_payloads_expires_at", "expires_at"),
+    )
+
+    token: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False)
+
+    @classmethod
+    async def get_payload(
+        cls,
+        token: str,
+        sqlite_session: AsyncSession
+    ) -> Optional[Row]:
+        """Returns the (payload, expires_at) row of the token, or None."""
+
+        stmt = select(cls.payload, cls.expires_at).where(cls.token == token)
+        result = await sqlite_session.execute(stmt)
+        return result.first()
+
+    @classmethod
+    async def save_payloads(
+        cls,
+        payloads: Dict[str, Tuple[str, float]],
+        sqlite_session: AsyncSession
+    ):
+        """Saves multiple token -> (payload, expires_at) entries in one statement, known tokens are extended."""
+
+        if not payloads:
+            return
+
+        stmt = sqlite_insert(cls)
+        stmt = stmt.on_conflict_do_update(index_elements=[cls.token], set_={"expires_at": stmt.excluded.expires_at})
+        await sqlite_session.execute(
+            stmt,
+            [
+                {"token": token, "payload": payload, "expires_at": expires_at}
+                for token, (payload, expires_at) in payloads.items()
+            ]
+        )
+
+    @classmethod
+    async def delete_expired(
+        cls,
+        now: float,
+        sqlite_session: AsyncSession
+    ) -> int:
+        stmt = delete(cls).where(cls.expires_at < now)
+        result = await sqlite_session.execute(stmt)
+        return result.rowcount
+
+
+###################################################################################################
+class TableMediaFile(Base):
+    """Model for storing telegram file_ids of uploaded media by content hash.
+
+    fields:
+
+        - content_key (str, unique): Bot ID, media type and content hash of the uploaded file.
+        - file_id (str): file_id of the file on the telegram servers.
+    """
+
+    __tablename__ = "table_media_files"
+
+    content_key: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
+    file_id: Mapped[str] = mapped_column(Text, nullable=False)
+
+    @classmethod
+    async def get_file_id(
+        cls,
+        content_key: str,
+        sqlite_session: AsyncSession
+    ) -> Optional[str]:
+        stmt = select(cls.file_id).where(cls.content_key == content_key)
+        result = await sqlite_session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    @classmethod
+    async def save_file_ids(
+        cls,
+        file_ids: Dict[str, str],
+        sqlite_session: AsyncSession
+    ):
+        """Saves multiple content_key -> file_id entries in one statement, known keys get the new file_id."""
+
+        if not file_ids:
+            return
+
+        stmt = sqlite_insert(cls)
+        stmt = stmt.on_conflict_do_update(index_elements=[cls.content_key], set_={"file_id": stmt.excluded.file_id})
+        await sqlite_session.execute(
+            stmt,
+            [{"content_key": content_key, "file_id": file_id} for content_key, file_id in file_ids.items()]
+        )
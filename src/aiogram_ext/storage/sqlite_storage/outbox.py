@@ -0,0 +1,96 @@
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .models import TableMenuMessage, TableNotificationMessage
+from .writer import SqliteWriter, run_write
+
+logger = logging.getLogger(__name__)
+
+
+class TrackingAction(str, Enum):
+    SAVE_MENUS = "save_menus"
+    CLOSE_MENUS = "close_menus"
+    SAVE_NOTIFICATIONS = "save_notifications"
+    CLOSE_NOTIFICATIONS = "close_notifications"
+    CLOSE_NOTIFICATION_BY_KEY = "close_notification_by_key"
+
+
+@dataclass
+class TrackingWrite:
+    """A message-tracking write recorded by a strategy."""
+
+    action: TrackingAction
+    chat_id: Optional[int] = None
+    msg_ids: List[int] = field(default_factory=list)
+    key: Optional[str] = None
+
+
+class TrackingOutbox:
+    """Keeps message-tracking writes out of the Telegram round trips.
+
+    Strategies record their writes while they talk to the Bot API and hand them over
+    once the API calls are finished. They are then committed in one short transaction
+    of their own, so no database lock is held while waiting for the network. Reads are
+    served from short read-only sessions for the same reason.
+
+    Args:
+        sqlite_session_pool: Session maker for reads and, without a writer, for commits
+        writer: Optional :class:`SqliteWriter`, see :func:`run_write`
+    """
+
+    def __init__(
+        self,
+        sqlite_session_pool: async_sessionmaker[AsyncSession],
+        writer: Optional[SqliteWriter] = None,
+    ):
+        self.sqlite_session_pool = sqlite_session_pool
+        self.writer = writer
+
+    async def get_last_menus(self, chat_id: int) -> List[int]:
+        async with self.sqlite_session_pool() as sqlite_session:
+            return list(await TableMenuMessage.get_last_menus(chat_id, sqlite_session))
+
+    async def get_last_notifications(self, chat_id: int) -> List[int]:
+        async with self.sqlite_session_pool() as sqlite_session:
+            return list(await TableNotificationMessage.get_last_notifications(chat_id, sqlite_session))
+
+    async def get_notifications_by_key(self, key: str) -> List[TableNotificationMessage]:
+        async with self.sqlite_session_pool() as sqlite_session:
+            return list(await TableNotificationMessage.get_notifications_by_key(key, sqlite_session))
+
+    async def commit(self, writes: List[TrackingWrite]) -> None:
+        """Applies the recorded writes in a single short transaction."""
+
+        if not writes:
+            return
+
+        await run_write(self.sqlite_session_pool, self.writer, lambda sqlite_session: self._apply(writes, sqlite_session))
+
+        logger.debug("TrackingOutbox committed %d writes", len(writes))
+
+    @staticmethod
+    async def _apply(writes: List[TrackingWrite], sqlite_session: AsyncSession) -> None:
+        for write in writes:
+            if write.action == TrackingAction.SAVE_MENUS:
+                await TableMenuMessage.save_menu_message_id(write.chat_id, write.msg_ids, sqlite_session)
+
+            elif write.action == TrackingAction.CLOSE_MENUS:
+                await TableMenuMessage.close_last_menus(write.chat_id, write.msg_ids, sqlite_session)
+
+            elif write.action == TrackingAction.SAVE_NOTIFICATIONS:
+                await TableNotificationMessage.save_notification_message_id(
+                    write.chat_id, write.msg_ids, write.key, sqlite_session
+                )
+
+            elif write.action == TrackingAction.CLOSE_NOTIFICATIONS:
+                await TableNotificationMessage.close_last_notifications(write.chat_id, write.msg_ids, sqlite_session)
+
+            elif write.action == TrackingAction.CLOSE_NOTIFICATION_BY_KEY:
+                await TableNotificationMessage.close_last_notification_by_key(write.key, sqlite_session)
+
+            else:
+                raise ValueError(f"Unknown tracking action: {write.action}")
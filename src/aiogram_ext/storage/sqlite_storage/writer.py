@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WriteJob = Callable[[AsyncSession], Awaitable[T]]
+
+
+@dataclass
+class _QueuedJob:
+    job: WriteJob
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class SqliteWriter:
+    """Dedicated writer task for the sqlite storage.
+
+    All writes are queued and executed by one task over one connection, so writers never
+    compete for the database lock. Jobs that are queued together are committed together.
+    If the group fails it is rolled back and its jobs are re-run one transaction each,
+    so a failing job is reported to its own caller only. Jobs must therefore be safe to re-run.
+
+    Use with an engine built by :func:`create_sqlite_engine` with `writer=True`.
+
+    Args:
+        engine: Single-connection writer engine
+        max_batch: Maximum number of jobs grouped into one commit (default: 256)
+    """
+
+    def __init__(self, engine: AsyncEngine, max_batch: int = 256):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.session_pool = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        self.queue: asyncio.Queue[Optional[_QueuedJob]] = asyncio.Queue()
+        self.worker_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self) -> None:
+        """Starts the writer task."""
+
+        self._stopping = False
+        if not self.worker_task or self.worker_task.done():
+            self.worker_task = asyncio.create_task(self._worker())
+            logger.info("SqliteWriter background worker has been launched.")
+
+    async def stop(self) -> None:
+        """Commits every queued job and stops the writer task, later submits are rejected."""
+
+        if self.worker_task:
+            self._stopping = True
+            await self.queue.put(None)
+            try:
+                await self.worker_task
+            finally:
+                self.worker_task = None
+                logger.info("SqliteWriter background worker has been stopped.")
+
+    async def submit(self, job: WriteJob) -> Any:
+        """Queues `job(session)` for the writer and returns its result once committed."""
+
+        if self._stopping or not self.worker_task or self.worker_task.done():
+            raise RuntimeError("SqliteWriter is not running, call start() first")
+
+        queued = _QueuedJob(job)
+        await self.queue.put(queued)
+        return await queued.future
+
+    async def _worker(self) -> None:
+        """Takes every job that is already queued and commits them as one transaction."""
+
+        stopping = False
+        while not stopping:
+            batch: List[_QueuedJob] = []
+
+            item = await self.queue.get()
+            if item is None:
+                stopping = True
+            else:
+                batch.append(item)
+
+            while len(batch) < self.max_batch and not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    continue
+                batch.append(item)
+
+            if batch:
+                await self._commit(batch)
+
+        # A job that slipped in behind the sentinel would otherwise wait forever.
+        while not self.queue.empty():
+            if (item := self.queue.get_nowait()) is not None and not item.future.done():
+                item.future.set_exception(RuntimeError("SqliteWriter has been stopped"))
+
+    async def _commit(self, batch: List[_QueuedJob]) -> None:
+        try:
+            results = await self._run(batch)
+
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error("SqliteWriter job failed: %s", e)
+                # The submitter may have been cancelled while the job was running.
+                if not batch[0].future.done():
+                    batch[0].future.set_exception(e)
+                return
+
+            # The group was rolled back as a whole, isolate the failing job(s).
+            logger.warning("SqliteWriter group of %d jobs failed, retrying one by one: %s", len(batch), e)
+            for queued in batch:
+                await self._commit([queued])
+            return
+
+        for queued, result in zip(batch, results):
+            if not queued.future.done():
+                queued.future.set_result(result)
+
+        logger.debug("SqliteWriter committed %d jobs", len(batch))
+
+    async def _run(self, batch: List[_QueuedJob]) -> List[Any]:
+        """Runs the jobs in one transaction and commits it."""
+
+        async with self.session_pool() as session:
+            async with session.begin():
+                return [await queued.job(session) for queued in batch]
+
+
+async def run_write(
+    sqlite_session_pool: async_sessionmaker[AsyncSession],
+    writer: Optional[SqliteWriter],
+    job: WriteJob,
+) -> Any:
+    """Runs `job(session)` through the writer task if there is one, else in its own transaction."""
+
+    if writer is not None:
+        return await writer.submit(job)
+
+    async with sqlite_session_pool() as sqlite_session:
+        async with sqlite_session.begin():
+            return await job(sqlite_session)
@@ -0,0 +1,294 @@
+import asyncio
+import heapq
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional, Tuple, Union
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.types import InlineKeyboardMarkup
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from aiogram_ext.keyboard.keyboard import Keyboard
+from aiogram_ext.notification.deleter import MessageDeleter
+from aiogram_ext.storage.sqlite_storage.ledger import MessageLedger
+from aiogram_ext.storage.sqlite_storage.models import TableTimer
+from aiogram_ext.storage.sqlite_storage.outbox import TrackingAction, TrackingOutbox, TrackingWrite
+from aiogram_ext.storage.sqlite_storage.writer import SqliteWriter, run_write
+
+logger = logging.getLogger(__name__)
+
+
+class TimerAction(str, Enum):
+    DELETE_MESSAGES = "delete_messages"
+    SEND_MESSAGE = "send_message"
+
+
+@dataclass
+class Timer:
+    id: int
+    fire_at: float
+    action: TimerAction
+    chat_id: int
+    payload: dict
+
+
+class TimerService:
+    """Persistent timers for scheduled deletions and messages.
+
+    Pending timers live in a binary heap ordered by fire time and in the sqlite storage,
+    so they survive a restart. A single worker task sleeps until the earliest timer is due,
+    scheduling and cancelling are O(log n) and no coroutine is kept per timer.
+
+    A timer that fails for a transient reason (network and server errors, flood control, messages
+    that could not be deleted) is fired again after an exponentially growing delay, at most
+    `max_attempts` times in all. Any other error, e.g. a chat that blocked the bot, is final.
+
+    Scheduled messages are tracked as notifications once sent, like the ones sent by
+    :class:`aiogram_ext.notification.notification.Notification`, so `close_notification` and
+    `delete_notification` remove them as well.
+
+    Args:
+        bot: Telegram bot instance
+        sqlite_session_pool: Session maker used for loading and persisting timers
+        writer: Optional :class:`SqliteWriter`, see :func:`run_write`
+        batch_size: Maximum number of timers fired concurrently (default: 100)
+        max_attempts: Maximum number of times a timer is fired (default: 5)
+        retry_delay: Delay in seconds before the first retry, doubled for every further one (default: 5.0)
+        ledger: Optional :class:`MessageLedger`, pass the notifications' ledger so sent messages are tracked in it
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        sqlite_session_pool: async_sessionmaker[AsyncSession],
+        writer: Optional[SqliteWriter] = None,
+        batch_size: int = 100,
+        ledger: Optional[MessageLedger] = None,
+        max_attempts: int = 5,
+        retry_delay: float = 5.0,
+    ):
+        self.bot = bot
+        self.sqlite_session_pool = sqlite_session_pool
+        self.writer = writer
+        self.batch_size = batch_size
+        self.ledger = ledger
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.outbox = TrackingOutbox(sqlite_session_pool, writer)
+
+        self._heap: List[Tuple[float, int]] = []
+        self._timers: Dict[int, Timer] = {}
+
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self.worker_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    async def start(self) -> None:
+        """Loads pending timers from the database and starts the worker."""
+
+        async with self.sqlite_session_pool() as sqlite_session:
+            records = await TableTimer.get_pending_timers(sqlite_session)
+
+        self._timers = {
+            timer_id: Timer(timer_id, fire_at, TimerAction(action), chat_id, json.loads(payload))
+            for timer_id, fire_at, action, chat_id, payload in records
+        }
+        self._heap = [(timer.fire_at, timer.id) for timer in self._timers.values()]
+        heapq.heapify(self._heap)
+        logger.info("TimerService loaded %d pending timers", len(self._timers))
+
+        self._stopping.clear()
+        if not self.worker_task or self.worker_task.done():
+            self.worker_task = asyncio.create_task(self._worker())
+            logger.info("TimerService background worker has been launched.")
+
+    async def stop(self) -> None:
+        """Stops the worker. Pending timers stay in the database."""
+
+        if self.worker_task:
+            self._stopping.set()
+            self._wakeup.set()
+            try:
+                await self.worker_task
+            finally:
+                self.worker_task = None
+                logger.info("TimerService background worker has been stopped.")
+
+    async def schedule_delete(self, chat_id: int, msg_ids: List[int], delay: float) -> int:
+        """Deletes the messages after `delay` seconds. Returns the timer ID."""
+
+        return await self._schedule(time.time() + delay, TimerAction.DELETE_MESSAGES, chat_id, {"msg_ids": list(msg_ids)})
+
+    async def schedule_message(
+        self,
+        chat_id: int,
+        text: str,
+        at: Union[datetime, float],
+        kbd: Optional[InlineKeyboardMarkup] = None,
+        key: Optional[str] = None,
+    ) -> int:
+        """Sends a message at time `at` (datetime or unix time). Returns the timer ID.
+
+        The message is tracked as a notification under `key`, a new key is generated if none is given.
+        Pass your own key to put a `delete_notification_{key}` button into `kbd`.
+        """
+
+        fire_at = at.timestamp() if isinstance(at, datetime) else float(at)
+        payload = {
+            "text": text,
+            "kbd": kbd.model_dump_json(exclude_none=True) if kbd is not None else None,
+            "key": key or Keyboard.generate_key(chat_id),
+        }
+        return await self._schedule(fire_at, TimerAction.SEND_MESSAGE, chat_id, payload)
+
+    async def cancel(self, timer_id: int) -> bool:
+        """Cancels a pending timer."""
+
+        if self._timers.pop(timer_id, None) is None:
+            return False
+
+        # The heap entry is skipped when it comes up.
+        await self._delete_records([timer_id])
+        return True
+
+    async def _schedule(self, fire_at: float, action: TimerAction, chat_id: int, payload: dict) -> int:
+        encoded = json.dumps(payload)
+
+        async def write(sqlite_session: AsyncSession) -> int:
+            return await TableTimer.add_timer(fire_at, action.value, chat_id, encoded, sqlite_session)
+
+        timer_id = await run_write(self.sqlite_session_pool, self.writer, write)
+
+        earliest = self._heap[0][0] if self._heap else None
+        self._push(Timer(timer_id, fire_at, action, chat_id, payload))
+        if earliest is None or fire_at < earliest:
+            self._wakeup.set()
+
+        return timer_id
+
+    def _push(self, timer: Timer) -> None:
+        self._timers[timer.id] = timer
+        heapq.heappush(self._heap, (timer.fire_at, timer.id))
+
+    async def _delete_records(self, timer_ids: List[int]) -> None:
+        async def write(sqlite_session: AsyncSession) -> None:
+            await TableTimer.delete_timers(timer_ids, sqlite_session)
+
+        await run_write(self.sqlite_session_pool, self.writer, write)
+
+    async def _worker(self) -> None:
+        """Sleeps until the earliest timer is due, then fires every due timer."""
+
+        while not self._stopping.is_set():
+            timeout = None
+            if self._heap:
+                timeout = max(self._heap[0][0] - time.time(), 0)
+
+            if timeout != 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            due: List[Timer] = []
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                _, timer_id = heapq.heappop(self._heap)
+                if (timer := self._timers.pop(timer_id, None)) is not None:
+                    due.append(timer)
+
+            if not due:
+                continue
+
+            results = await asyncio.gather(*(self._fire(timer) for timer in due))
+            finished = [timer.id for timer, done in zip(due, results) if done]
+            retried = [timer for timer, done in zip(due, results) if not done]
+
+            for timer in retried:
+                self._push(timer)
+
+            try:
+                await self._update_records(finished, retried)
+            except Exception as e:
+                logger.error("Error updating %d fired timers: %s", len(due), e, exc_info=True)
+
+    async def _fire(self, timer: Timer) -> bool:
+        """Fires the timer, returns False if it was rescheduled after a transient failure."""
+
+        retry_after: Optional[float] = None
+        try:
+            if timer.action == TimerAction.DELETE_MESSAGES:
+                failed = await MessageDeleter.for_bot(self.bot).delete(timer.chat_id, timer.payload["msg_ids"])
+                if failed:
+                    # The deleter does not tell why, so only the IDs that are left are tried again.
+                    logger.debug("Timer %d could not delete messages %s", timer.id, failed)
+                    timer.payload["msg_ids"] = failed
+                    return self._retry(timer, None)
+
+            elif timer.action == TimerAction.SEND_MESSAGE:
+                kbd = timer.payload.get("kbd")
+                msg = await self.bot.send_message(
+                    chat_id=timer.chat_id,
+                    text=timer.payload["text"],
+                    reply_markup=InlineKeyboardMarkup.model_validate_json(kbd) if kbd else None
+                )
+                # Timers stored before keys were kept in the payload get a fresh one.
+                key = timer.payload.get("key") or Keyboard.generate_key(timer.chat_id)
+                try:
+                    await self._save_notification(timer.chat_id, msg.message_id, key)
+                except Exception as e:
+                    logger.error("Timer %d sent message %d but cannot track it: %s", timer.id, msg.message_id, e)
+
+            return True
+
+        except TelegramRetryAfter as e:
+            retry_after = e.retry_after
+            error: Exception = e
+        except (TelegramNetworkError, TelegramServerError, asyncio.TimeoutError) as e:
+            error = e
+        except Exception as e:
+            logger.warning("Timer %d (%s) for chat %d failed: %s", timer.id, timer.action.value, timer.chat_id, e)
+            return True
+
+        logger.warning("Timer %d (%s) for chat %d failed, will retry: %s", timer.id, timer.action.value, timer.chat_id, error)
+        return self._retry(timer, retry_after)
+
+    def _retry(self, timer: Timer, delay: Optional[float]) -> bool:
+        """Moves the timer to its next attempt, returns True if it has no attempts left."""
+
+        attempts = timer.payload.get("attempts", 0) + 1
+        if attempts >= self.max_attempts:
+            logger.warning("Timer %d (%s) for chat %d gave up after %d attempts", timer.id, timer.action.value, timer.chat_id, attempts)
+            return True
+
+        timer.payload["attempts"] = attempts
+        timer.fire_at = time.time() + (delay if delay is not None else self.retry_delay * 2 ** (attempts - 1))
+        return False
+
+    async def _update_records(self, finished: List[int], retried: List[Timer]) -> None:
+        async def write(sqlite_session: AsyncSession) -> None:
+            if finished:
+                await TableTimer.delete_timers(finished, sqlite_session)
+            if retried:
+                await TableTimer.reschedule_timers(
+                    {timer.id: (timer.fire_at, json.dumps(timer.payload)) for timer in retried}, sqlite_session
+                )
+
+        await run_write(self.sqlite_session_pool, self.writer, write)
+
+    async def _save_notification(self, chat_id: int, msg_id: int, key: str) -> None:
+        if self.ledger is not None:
+            self.ledger.save_notification_message_id(chat_id, [msg_id], key)
+            return
+        await self.outbox.commit([TrackingWrite(TrackingAction.SAVE_NOTIFICATIONS, chat_id, [msg_id], key)])